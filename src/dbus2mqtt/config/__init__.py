@@ -1,4 +1,3 @@
-import fnmatch
 import uuid
 import warnings
 
@@ -7,17 +6,23 @@ from typing import Any, Literal
 
 from jsonargparse.typing import SecretStr
 
-from dbus2mqtt.template.templating import TemplateEngine
+from dbus2mqtt.config.subscription_matcher import SubscriptionMatcher
+from dbus2mqtt.template.templating import CompiledTemplate, TemplateEngine
 
 
 @dataclass
 class SignalConfig:
     signal: str
     filter: str | None = None
+    _filter_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        if self.filter:
+            self._filter_template = template_engine.compile_template(self.filter)
 
     def matches_filter(self, template_engine: TemplateEngine, *args) -> bool:
         if self.filter:
-            return template_engine.render_template(self.filter, bool, { "args": args })
+            return template_engine.render_template(self._filter_template or self.filter, bool, { "args": args })
         return True
 
 @dataclass
@@ -36,23 +41,39 @@ class InterfaceConfig:
     signals: list[SignalConfig] = field(default_factory=list)
     methods: list[MethodConfig] = field(default_factory=list)
     properties: list[PropertyConfig] = field(default_factory=list)
+    mirror_properties: bool = False
+    """Keep a local copy of all properties, updated from PropertiesChanged signals. Used by dbus_property_get and dbus_properties"""
+    _mqtt_command_topic_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+    _mqtt_response_topic_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        if self.mqtt_command_topic:
+            self._mqtt_command_topic_template = template_engine.compile_template(self.mqtt_command_topic)
+        if self.mqtt_response_topic:
+            self._mqtt_response_topic_template = template_engine.compile_template(self.mqtt_response_topic)
+        for signal in self.signals:
+            signal.compile_templates(template_engine)
 
     def render_mqtt_command_topic(self, template_engine: TemplateEngine, context: dict[str, Any]) -> Any:
         if self.mqtt_command_topic:
-            return template_engine.render_template(self.mqtt_command_topic, str, context)
+            return template_engine.render_template(self._mqtt_command_topic_template or self.mqtt_command_topic, str, context)
         return None
 
     def render_mqtt_response_topic(self, template_engine: TemplateEngine, context: dict[str, Any]) -> str | None:
         if self.mqtt_response_topic:
-            return template_engine.render_template(self.mqtt_response_topic, str, context)
+            return template_engine.render_template(self._mqtt_response_topic_template or self.mqtt_response_topic, str, context)
         return None
 
+FlowTriggerPriority = Literal["high", "normal", "low"]
+
 @dataclass
 class FlowTriggerScheduleConfig:
     type: Literal["schedule"] = "schedule"
     id: str = field(default_factory=lambda: uuid.uuid4().hex)
     cron: dict[str, object] | None = None
     interval: dict[str, object] | None = None
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
 
 @dataclass
 class FlowTriggerDbusSignalConfig:
@@ -62,10 +83,28 @@ class FlowTriggerDbusSignalConfig:
     bus_name: str | None = None
     path: str | None = None
     # filter: str | None = None
+    debounce: float | None = None
+    """Collapse signal bursts per bus_name and path, a burst ends after this many seconds without signals"""
+    throttle: float | None = None
+    """Trigger at most once per this many seconds per bus_name and path"""
+    leading: bool = False
+    """Trigger on the first signal of a debounce or throttle window"""
+    trailing: bool = True
+    """Trigger at the end of a debounce or throttle window, with the merged args of all signals in the window"""
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
+
+    def __post_init__(self):
+        if self.debounce and self.throttle:
+            raise ValueError(f"{self.type} flow trigger can't be configured with both debounce and throttle")
+        if (self.debounce or self.throttle) and not (self.leading or self.trailing):
+            raise ValueError(f"{self.type} flow trigger requires leading and/or trailing when debounce or throttle is set")
 
 @dataclass
 class FlowTriggerBusNameAddedConfig:
     type: Literal["bus_name_added"] = "bus_name_added"
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
 
     def __post_init__(self):
         warnings.warn(f"{self.type} flow trigger may be removed in a future version.", DeprecationWarning, stacklevel=2)
@@ -73,6 +112,8 @@ class FlowTriggerBusNameAddedConfig:
 @dataclass
 class FlowTriggerBusNameRemovedConfig:
     type: Literal["bus_name_removed"] = "bus_name_removed"
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
 
     def __post_init__(self):
         warnings.warn(f"{self.type} flow trigger may be removed in a future version.", DeprecationWarning, stacklevel=2)
@@ -81,21 +122,32 @@ class FlowTriggerBusNameRemovedConfig:
 class FlowTriggerObjectAddedConfig:
     type: Literal["object_added"] = "object_added"
     # filter: str | None = None
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
 
 @dataclass
 class FlowTriggerObjectRemovedConfig:
     type: Literal["object_removed"] = "object_removed"
     # filter: str | None = None
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
 
 @dataclass
 class FlowTriggerMqttMessageConfig:
     topic: str
     type: Literal["mqtt_message"] = "mqtt_message"
     filter: str | None = None
+    priority: FlowTriggerPriority | None = None
+    """Priority lane of this trigger, overrides flow_processor.priorities"""
+    _filter_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        if self.filter:
+            self._filter_template = template_engine.compile_template(self.filter)
 
     def matches_filter(self, template_engine: TemplateEngine, trigger_context: dict[str, Any]) -> bool:
         if self.filter:
-            return template_engine.render_template(self.filter, bool, trigger_context)
+            return template_engine.render_template(self._filter_template or self.filter, bool, trigger_context)
         return True
 
 FlowTriggerConfig = (
@@ -115,6 +167,16 @@ class FlowActionContextSetConfig:
     """Per flow execution context"""
     global_context: dict[str, object] | None = None
     """Global context, shared between multiple flow executions, over all subscriptions"""
+    render_concurrency: int | None = None
+    """Max number of keys rendered concurrently, overrides templating.dict_render_concurrency"""
+    _context_template: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+    _global_context_template: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        if self.context:
+            self._context_template = template_engine.compile_template(self.context)
+        if self.global_context:
+            self._global_context_template = template_engine.compile_template(self.global_context)
 
 @dataclass
 class FlowActionMqttPublishConfig:
@@ -122,12 +184,28 @@ class FlowActionMqttPublishConfig:
     payload_template: str | dict[str, Any]
     type: Literal["mqtt_publish"] = "mqtt_publish"
     payload_type: Literal["json", "yaml", "text", "binary"] = "json"
+    render_concurrency: int | None = None
+    """Max number of payload_template keys rendered concurrently, overrides templating.dict_render_concurrency"""
+    only_on_change: bool = False
+    """Skip publishing when the payload equals the last payload published to the same topic"""
+    refresh_interval: float | None = None
+    """Publish unchanged payloads anyway when the last publish is this many seconds ago, used with only_on_change"""
+    _topic_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+    _payload_template: CompiledTemplate | dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        self._topic_template = template_engine.compile_template(self.topic)
+        self._payload_template = template_engine.compile_template(self.payload_template)
 
 @dataclass
 class FlowActionLogConfig:
     msg: str
     type: Literal["log"] = "log"
     level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    _msg_template: CompiledTemplate | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        self._msg_template = template_engine.compile_template(self.msg)
 
 FlowActionConfig = (
     FlowActionMqttPublishConfig
@@ -141,6 +219,17 @@ class FlowConfig:
     actions: list[FlowActionConfig]
     name: str | None = None
     id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    queue_mode: Literal["fifo", "latest"] = "fifo"
+    """latest: a new trigger replaces a still pending trigger of the same flow, trigger and queue_key values"""
+    queue_key: list[str] = field(default_factory=lambda: ["bus_name", "path"])
+    """Trigger context keys identifying pending triggers when queue_mode is latest"""
+
+    def compile_templates(self, template_engine: TemplateEngine):
+        for trigger in self.triggers:
+            if isinstance(trigger, FlowTriggerMqttMessageConfig):
+                trigger.compile_templates(template_engine)
+        for action in self.actions:
+            action.compile_templates(template_engine)
 
 @dataclass
 class SubscriptionConfig:
@@ -152,27 +241,55 @@ class SubscriptionConfig:
     flows: list[FlowConfig] = field(default_factory=list)
     id: str = field(default_factory=lambda: uuid.uuid4().hex)
 
+    def compile_templates(self, template_engine: TemplateEngine):
+        for interface in self.interfaces:
+            interface.compile_templates(template_engine)
+        for flow in self.flows:
+            flow.compile_templates(template_engine)
+
 @dataclass
 class DbusConfig:
     subscriptions: list[SubscriptionConfig]
     bus_type: Literal["SESSION", "SYSTEM"] = "SESSION"
+    startup_concurrency: int = 8
+    """Maximum number of bus_names that are introspected and subscribed concurrently on startup"""
+    startup_timeout: float = 10
+    """Timeout in seconds for introspecting and subscribing a single bus_name on startup"""
+    introspection_concurrency: int = 16
+    """Maximum number of concurrent introspection calls while walking the object tree of a single bus_name"""
+    object_manager_discovery: bool = True
+    """Resolve wildcard paths using org.freedesktop.DBus.ObjectManager.GetManagedObjects when available"""
+    introspection_cache_ttl: float = 300
+    """Time in seconds introspection data of an object is cached, 0 disables caching"""
+    introspection_cache_file: str | None = None
+    """Optional file to persist cached introspection data of well-known bus_names between restarts"""
+    _matcher: SubscriptionMatcher = field(init=False, repr=False, compare=False)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
 
-    def is_bus_name_configured(self, bus_name: str) -> bool:
+    def __post_init__(self):
+        self.subscriptions_changed()
 
-        for subscription in self.subscriptions:
-            if fnmatch.fnmatchcase(bus_name, subscription.bus_name):
-                return True
-        return False
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        # subscriptions replaced after loading the config
+        if name == "subscriptions" and "_matcher" in self.__dict__:
+            self.subscriptions_changed()
+
+    @property
+    def version(self) -> int:
+        """Incremented on every subscriptions change, used to refresh indices built from the subscriptions"""
+        return self._version
+
+    def subscriptions_changed(self):
+        """Rebuilds the subscription matcher, call after changing subscriptions, their interfaces or flows in place"""
+        self._matcher = SubscriptionMatcher(self.subscriptions)
+        self._version += 1
+
+    def is_bus_name_configured(self, bus_name: str) -> bool:
+        return self._matcher.is_bus_name_configured(bus_name)
 
     def get_subscription_configs(self, bus_name: str, path: str|None = None) -> list[SubscriptionConfig]:
-        res: list[SubscriptionConfig] = []
-        for subscription in self.subscriptions:
-            if fnmatch.fnmatchcase(bus_name, subscription.bus_name):
-                if not path or path == subscription.path:
-                    res.append(subscription)
-                elif fnmatch.fnmatchcase(path, subscription.path):
-                    res.append(subscription)
-        return res
+        return self._matcher.get_subscription_configs(bus_name, path)
 
 @dataclass
 class MqttConfig:
@@ -181,9 +298,60 @@ class MqttConfig:
     password: SecretStr
     port: int = 1883
     subscription_topics: list[str] = field(default_factory=lambda: ['dbus2mqtt/#'])
+    publish_max_inflight: int = 20
+    """Maximum number of published messages not yet confirmed by the network thread, publishing waits when reached"""
+    publish_timeout: float = 30
+    """Time in seconds a published message may take to be confirmed before it's logged as failed and its in-flight slot is freed"""
+    publish_digest_cache_size: int = 1024
+    """Maximum number of topics for which the last published payload digest is kept, used by mqtt_publish only_on_change"""
+
+@dataclass
+class TemplatingConfig:
+    cache_size: int = 512
+    """Maximum number of compiled templates kept in memory, 0 disables caching"""
+    dict_render_concurrency: int = 1
+    """Maximum number of dict template keys calling async functions that are rendered concurrently, 1 renders keys one by one"""
+
+@dataclass
+class FlowProcessorConfig:
+    workers: int = 1
+    """Maximum number of flow executions running concurrently, 1 executes flows one by one"""
+    ordering_key: list[str] = field(default_factory=lambda: ["flow_id"])
+    """flow_id and/or trigger context keys, triggers with equal values are executed in order and never concurrently"""
+    ordering_backlog_size: int = 100
+    """Maximum number of triggers waiting for a busy ordering key, no more triggers are taken from the queue when reached"""
+    priorities: dict[str, FlowTriggerPriority] = field(default_factory=dict)
+    """Priority lane per trigger type, overrides the defaults: mqtt_message high, schedule low and all others normal"""
+    starvation_limit: int = 10
+    """Max number of triggers taken from higher priority lanes while a lower priority lane is waiting, 0 disables starvation protection"""
 
 @dataclass
 class Config:
     mqtt: MqttConfig
     dbus: DbusConfig
     flows: list[FlowConfig] = field(default_factory=list)
+    templating: TemplatingConfig = field(default_factory=TemplatingConfig)
+    flow_processor: FlowProcessorConfig = field(default_factory=FlowProcessorConfig)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        # flows replaced after loading the config
+        if name in ("flows", "dbus") and "_version" in self.__dict__:
+            self.flows_changed()
+
+    @property
+    def version(self) -> tuple[int, int]:
+        """Changes on every flows or subscriptions change, used to refresh indices built from the flows"""
+        return (self._version, self.dbus.version)
+
+    def flows_changed(self):
+        """Call after changing flows or their triggers in place, for subscription flows use DbusConfig.subscriptions_changed"""
+        self._version += 1
+
+def compile_config_templates(config: Config, template_engine: TemplateEngine):
+    """Compiles all configured templates ahead of time, raises a TemplateError on invalid templates"""
+    for subscription in config.dbus.subscriptions:
+        subscription.compile_templates(template_engine)
+    for flow in config.flows:
+        flow.compile_templates(template_engine)
@@ -0,0 +1,110 @@
+import fnmatch
+import re
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dbus2mqtt.config import SubscriptionConfig
+
+_WILDCARD_CHARS = ("*", "?", "[")
+
+def _has_wildcards(pattern: str) -> bool:
+    return any(c in pattern for c in _WILDCARD_CHARS)
+
+class _PrefixTrie:
+    """Character trie for 'prefix*' patterns, lookup cost depends on the name length only"""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, prefix: str, index: int):
+        node = self.root
+        for c in prefix:
+            node = node.setdefault(c, {})
+        node.setdefault(None, []).append(index)
+
+    def find(self, name: str) -> list[int]:
+        res: list[int] = []
+        node = self.root
+        res.extend(node.get(None, []))
+        for c in name:
+            node = node.get(c)
+            if node is None:
+                break
+            res.extend(node.get(None, []))
+        return res
+
+class SubscriptionMatcher:
+    """Pre-indexed lookup of subscription configs by bus_name and path.
+
+    bus_name patterns are split into exact names (dict lookup), 'prefix*' patterns (prefix trie)
+    and all other wildcard patterns, which are pre-filtered by one combined regex.
+    Results are memoized per (bus_name, path).
+    """
+
+    def __init__(self, subscriptions: list["SubscriptionConfig"], cache_size: int = 4096):
+        self.subscriptions = subscriptions
+        self.cache_size = cache_size
+
+        self._exact: dict[str, list[int]] = {}
+        self._prefixes = _PrefixTrie()
+        self._patterns: list[tuple[int, re.Pattern]] = []
+
+        for index, subscription in enumerate(subscriptions):
+            pattern = subscription.bus_name
+            if not _has_wildcards(pattern):
+                self._exact.setdefault(pattern, []).append(index)
+            elif pattern.endswith("*") and not _has_wildcards(pattern[:-1]):
+                self._prefixes.add(pattern[:-1], index)
+            else:
+                self._patterns.append((index, re.compile(fnmatch.translate(pattern))))
+
+        self._combined_pattern = re.compile("|".join(p.pattern for _, p in self._patterns)) if self._patterns else None
+
+        self._bus_name_cache: dict[str, list[int]] = {}
+        self._subscription_cache: dict[tuple[str, str | None], list[SubscriptionConfig]] = {}
+
+    def _match_bus_name(self, bus_name: str) -> list[int]:
+
+        indexes = self._bus_name_cache.get(bus_name)
+        if indexes is not None:
+            return indexes
+
+        matches = set(self._exact.get(bus_name, []))
+        matches.update(self._prefixes.find(bus_name))
+        if self._combined_pattern is not None and self._combined_pattern.match(bus_name):
+            matches.update(index for index, pattern in self._patterns if pattern.match(bus_name))
+
+        # keep the configured subscription order
+        indexes = sorted(matches)
+
+        if len(self._bus_name_cache) >= self.cache_size:
+            self._bus_name_cache.clear()
+        self._bus_name_cache[bus_name] = indexes
+
+        return indexes
+
+    def is_bus_name_configured(self, bus_name: str) -> bool:
+        return len(self._match_bus_name(bus_name)) > 0
+
+    def get_subscription_configs(self, bus_name: str, path: str | None = None) -> list["SubscriptionConfig"]:
+        """Returns matching subscription configs in configured order. The returned list is shared, do not modify it"""
+
+        key = (bus_name, path)
+        res = self._subscription_cache.get(key)
+        if res is not None:
+            return res
+
+        res = []
+        for index in self._match_bus_name(bus_name):
+            subscription = self.subscriptions[index]
+            if not path or path == subscription.path:
+                res.append(subscription)
+            elif fnmatch.fnmatchcase(path, subscription.path):
+                res.append(subscription)
+
+        if len(self._subscription_cache) >= self.cache_size:
+            self._subscription_cache.clear()
+        self._subscription_cache[key] = res
+
+        return res
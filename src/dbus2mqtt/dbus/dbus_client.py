@@ -1,6 +1,8 @@
+import asyncio
 import fnmatch
 import json
 import logging
+import time
 
 from datetime import datetime
 from typing import Any
@@ -9,12 +11,21 @@ import dbus_fast.aio as dbus_aio
 import dbus_fast.constants as dbus_constants
 import dbus_fast.introspection as dbus_introspection
 import dbus_fast.message as dbus_message
-import janus
 
 from dbus_fast import SignatureTree
+from dbus_fast.errors import DBusError
 
 from dbus2mqtt import AppContext
-from dbus2mqtt.config import SubscriptionConfig
+from dbus2mqtt.config import (
+    FlowConfig,
+    FlowTriggerDbusSignalConfig,
+    SubscriptionConfig,
+)
+from dbus2mqtt.dbus.dbus_command_routes import DbusCommandRoutes
+from dbus2mqtt.dbus.dbus_match_rules import (
+    build_signal_match_rule,
+    parse_signal_filter_args,
+)
 from dbus2mqtt.dbus.dbus_types import (
     BusNameSubscriptions,
     DbusSignalWithState,
@@ -23,13 +34,19 @@ from dbus2mqtt.dbus.dbus_types import (
 from dbus2mqtt.dbus.dbus_util import (
     camel_to_snake,
     convert_mqtt_args_to_dbus,
+    object_manager_candidate_paths,
+    path_subtree_may_match,
     unwrap_dbus_object,
     unwrap_dbus_objects,
 )
+from dbus2mqtt.dbus.introspection_cache import IntrospectionCache
 from dbus2mqtt.dbus.introspection_patches.mpris_playerctl import (
     mpris_introspection_playerctl,
 )
 from dbus2mqtt.dbus.introspection_patches.mpris_vlc import mpris_introspection_vlc
+from dbus2mqtt.dbus.name_owner_table import NameOwnerTable
+from dbus2mqtt.dbus.property_mirror import PropertyMirror
+from dbus2mqtt.dbus.signal_trigger_coalescer import SignalTriggerCoalescer
 from dbus2mqtt.event_broker import MqttMessage, MqttReceiveHints
 from dbus2mqtt.flow.flow_processor import FlowScheduler, FlowTriggerMessage
 
@@ -48,9 +65,16 @@ class DbusClient:
         self.bus = bus
         self.flow_scheduler = flow_scheduler
         self.subscriptions: dict[str, BusNameSubscriptions] = {}
+        self.command_routes = DbusCommandRoutes(self.config, self.templating)
+        self.name_owners = NameOwnerTable()
+        self.property_mirror = PropertyMirror()
+        self.signal_coalescer = SignalTriggerCoalescer(self._emit_dbus_signal_trigger)
+        self._property_mirror_match_rules: dict[tuple[str, str, str], str] = {}
+        self._property_refetch_tasks: set[asyncio.Task] = set()
+        self.introspection_cache = IntrospectionCache(self.config.introspection_cache_ttl, self.config.introspection_cache_file)
 
-        self._dbus_signal_queue = janus.Queue[DbusSignalWithState]()
-        self._dbus_object_lifecycle_signal_queue = janus.Queue[dbus_message.Message]()
+        self._dbus_signal_queue = asyncio.Queue[DbusSignalWithState]()
+        self._dbus_object_lifecycle_signal_queue = asyncio.Queue[dbus_message.Message]()
 
         self._name_owner_match_rule = "sender='org.freedesktop.DBus',interface='org.freedesktop.DBus',path='/org/freedesktop/DBus',member='NameOwnerChanged'"
         self._interfaces_added_match_rule = "interface='org.freedesktop.DBus.ObjectManager',type='signal',member='InterfacesAdded'"
@@ -78,13 +102,57 @@ class DbusClient:
             dbus_interface = obj.get_interface('org.freedesktop.DBus')
 
             # subscribe to existing registered bus_names we are interested in
+            list_names_start = time.monotonic()
             connected_bus_names = await dbus_interface.__getattribute__("call_list_names")()
+            list_names_duration = time.monotonic() - list_names_start
+
+            configured_bus_names = [b for b in connected_bus_names if self.config.is_bus_name_configured(b)]
+
+            self.introspection_cache.load()
+            await self._load_name_owners(configured_bus_names)
 
-            new_subscribed_interfaces: list[SubscribedInterface] = []
-            for bus_name in connected_bus_names:
-                new_subscribed_interfaces.extend(await self._handle_bus_name_added(bus_name))
+            discovery_start = time.monotonic()
+            new_subscribed_interfaces = await self._handle_bus_names_added_on_startup(configured_bus_names)
+            discovery_duration = time.monotonic() - discovery_start
+
+            await self.introspection_cache.async_save()
 
             logger.info(f"subscriptions on startup: {list(set([si.bus_name for si in new_subscribed_interfaces]))}")
+            logger.info(
+                f"startup timing: list_names={list_names_duration * 1000:.0f}ms, "
+                f"discovery={discovery_duration * 1000:.0f}ms for {len(configured_bus_names)} of {len(connected_bus_names)} bus_names"
+            )
+
+    async def _handle_bus_names_added_on_startup(self, bus_names: list[str]) -> list[SubscribedInterface]:
+        """Subscribes to all given bus_names concurrently, limited by dbus.startup_concurrency.
+        A bus_name that doesn't complete within dbus.startup_timeout is skipped without blocking the others.
+        """
+
+        semaphore = asyncio.Semaphore(max(1, self.config.startup_concurrency))
+        durations: dict[str, float] = {}
+
+        async def _handle_bus_name(bus_name: str) -> list[SubscribedInterface]:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    return await asyncio.wait_for(self._handle_bus_name_added(bus_name), timeout=self.config.startup_timeout)
+                except asyncio.TimeoutError:
+                    # the subscription was cancelled halfway, don't leave a partially subscribed bus_name behind
+                    await self._discard_bus_name_subscriptions(bus_name)
+                    logger.warning(f"startup: subscribing bus_name={bus_name} timed out after {self.config.startup_timeout}s, skipping")
+                except Exception as e:
+                    await self._discard_bus_name_subscriptions(bus_name)
+                    logger.warning(f"startup: subscribing bus_name={bus_name} failed, exception={e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+                finally:
+                    durations[bus_name] = time.monotonic() - start
+                return []
+
+        results = await asyncio.gather(*[_handle_bus_name(bus_name) for bus_name in bus_names])
+
+        slowest = sorted(durations.items(), key=lambda d: d[1], reverse=True)[:5]
+        logger.debug(f"startup timing per bus_name (slowest first): {[f'{b}={d * 1000:.0f}ms' for b, d in slowest]}")
+
+        return [si for result in results for si in result]
 
     async def _add_match_rule(self, match_rule: str):
         reply = await self.bus.call(dbus_message.Message(
@@ -110,28 +178,55 @@ class DbusClient:
 
     def get_well_known_bus_name(self, unique_bus_name: str) -> str:
 
-        for bns in self.subscriptions.values():
-            if unique_bus_name == bns.unique_name:
-                return bns.bus_name
+        names = self.name_owners.get_names(unique_bus_name)
 
-        # # dbus_fast keeps track of well known bus_names for the high-level API.
-        # # We can use this to find the bus_name for the sender.
-        # for k, v in self.bus._name_owners.items():
-        #     if v == unique_bus_name:
-        #         return v
+        # prefer subscribed bus_names, then configured bus_names
+        for name in names:
+            if name in self.subscriptions:
+                return name
+        for name in names:
+            if self.config.is_bus_name_configured(name):
+                return name
 
         return unique_bus_name
 
     async def get_unique_name(self, name) -> str | None:
 
-        if name.startswith(":"):
-            return name
+        unique_name = self.name_owners.get_owner(name)
+        if unique_name:
+            return unique_name
+
+        unique_name = await self._get_name_owner(name)
+        self.name_owners.set_owner(name, unique_name)
+        return unique_name
+
+    async def _get_name_owner(self, name: str) -> str:
+
+        reply = await self.bus.call(dbus_message.Message(
+            destination='org.freedesktop.DBus',
+            path='/org/freedesktop/DBus',
+            interface='org.freedesktop.DBus',
+            member='GetNameOwner',
+            signature='s',
+            body=[name]
+        ))
+
+        assert reply is not None
+        if reply.message_type == dbus_constants.MessageType.ERROR:
+            raise DBusError._from_message(reply)
+
+        return reply.body[0]
 
-        introspect = await self.bus.introspect("org.freedesktop.DBus", "/org/freedesktop/DBus")
-        proxy = self.bus.get_proxy_object("org.freedesktop.DBus", "/org/freedesktop/DBus", introspect)
-        dbus_interface = proxy.get_interface("org.freedesktop.DBus")
+    async def _load_name_owners(self, bus_names: list[str]):
+        """Seeds the name owner table, it is kept up to date using NameOwnerChanged signals afterwards"""
 
-        return await dbus_interface.call_get_name_owner(name) # type: ignore
+        async def _load_name_owner(name: str):
+            try:
+                self.name_owners.set_owner(name, await self._get_name_owner(name))
+            except Exception as e:
+                logger.debug(f"GetNameOwner failed, name={name}: {e}")
+
+        await asyncio.gather(*[_load_name_owner(name) for name in bus_names if not name.startswith(":")])
 
     def object_lifecycle_signal_handler(self, message: dbus_message.Message) -> None:
 
@@ -141,7 +236,7 @@ class DbusClient:
         logger.debug(f'object_lifecycle_signal_handler: interface={message.interface}, member={message.member}, body={message.body}')
 
         if message.interface in ['org.freedesktop.DBus', 'org.freedesktop.DBus.ObjectManager']:
-            self._dbus_object_lifecycle_signal_queue.sync_q.put(message)
+            self._dbus_object_lifecycle_signal_queue.put_nowait(message)
 
     def get_bus_name_subscriptions(self, bus_name: str) -> BusNameSubscriptions | None:
 
@@ -183,16 +278,29 @@ class DbusClient:
 
             assert unique_name is not None
 
-            bus_name_subscriptions = BusNameSubscriptions(bus_name, unique_name)
-            self.subscriptions[bus_name] = bus_name_subscriptions
+            proxy_object = self.bus.get_proxy_object(bus_name, path, introspection)
+            return proxy_object, self._add_subscribed_proxy_object(bus_name, unique_name, path, proxy_object)
 
         proxy_object = bus_name_subscriptions.path_objects.get(path)
         if not proxy_object:
             proxy_object = self.bus.get_proxy_object(bus_name, path, introspection)
-            bus_name_subscriptions.path_objects[path] = proxy_object
+            self._add_subscribed_proxy_object(bus_name, bus_name_subscriptions.unique_name, path, proxy_object)
 
         return proxy_object, bus_name_subscriptions
 
+    def _add_subscribed_proxy_object(self, bus_name: str, unique_name: str, path: str, proxy_object: dbus_aio.proxy_object.ProxyObject) -> BusNameSubscriptions:
+        """Registers a subscribed proxy_object and its mqtt command routes"""
+
+        bus_name_subscriptions = self.get_bus_name_subscriptions(bus_name)
+        if not bus_name_subscriptions:
+            bus_name_subscriptions = BusNameSubscriptions(bus_name, unique_name)
+            self.subscriptions[bus_name] = bus_name_subscriptions
+
+        bus_name_subscriptions.path_objects[path] = proxy_object
+        self.command_routes.add_object(bus_name, path, proxy_object)
+
+        return bus_name_subscriptions
+
     def _dbus_fast_signal_publisher(self, dbus_signal_state: dict[str, Any], *args):
         """publish a dbus signal to the event broker, one for each subscription_config"""
 
@@ -203,7 +311,7 @@ class DbusClient:
             subscription_config = signal_subscription["subscription_config"]
             signal_config = signal_subscription["signal_config"]
 
-            self._dbus_signal_queue.sync_q.put(
+            self._dbus_signal_queue.put_nowait(
                 DbusSignalWithState(
                     bus_name=dbus_signal_state["bus_name"],
                     path=dbus_signal_state["path"],
@@ -239,6 +347,13 @@ class DbusClient:
         logger.debug(f"subscribe: bus_name={bus_name}, path={path}, interface={interface.name}, proxy_interface: signals={list(interface_signals.keys())}")
         signal_subscription_count = 0
 
+        # Let the bus daemon drop unwanted signals. The match rule can only be changed before the first signal handler is added
+        if not obj_interface._signal_handlers:
+            match_rule = self._get_signal_match_rule(obj_interface._signal_match_rule, interface_signals, configured_signals)
+            if match_rule:
+                logger.debug(f"subscribe: using match_rule={match_rule}")
+                obj_interface._signal_match_rule = match_rule
+
         for signal, signal_subscriptions in configured_signals.items():
             interface_signal = interface_signals.get(signal)
             if interface_signal:
@@ -262,12 +377,42 @@ class DbusClient:
 
         return signal_subscription_count
 
+    def _get_signal_match_rule(self, base_match_rule: str, interface_signals: dict[str, dbus_introspection.Signal], configured_signals: dict[str, list[dict]]) -> str | None:
+        """Returns a match rule narrowed to the signal member when a single signal is subscribed.
+        When all its filters are the same string equality checks on args, e.g. "{{ args[0] == 'x' }}",
+        these are added as argN clauses. Filters are always evaluated in Python as well.
+        """
+
+        if len(configured_signals) != 1:
+            return None
+
+        signal, signal_subscriptions = next(iter(configured_signals.items()))
+        interface_signal = interface_signals.get(signal)
+        if interface_signal is None:
+            return None
+
+        arg_values: dict[int, str] | None = None
+        for signal_subscription in signal_subscriptions:
+            signal_config = signal_subscription["signal_config"]
+            values = parse_signal_filter_args(self.templating, signal_config.filter) if signal_config.filter else None
+            if values is None or (arg_values is not None and values != arg_values):
+                arg_values = {}
+                break
+            arg_values = values
+
+        # argN clauses only match string arguments
+        if arg_values and any(i >= len(interface_signal.args) or interface_signal.args[i].signature != "s" for i in arg_values):
+            arg_values = {}
+
+        return build_signal_match_rule(base_match_rule, signal, arg_values or {})
+
     async def _process_interface(self, bus_name: str, path: str, introspection: dbus_introspection.Node, interface: dbus_introspection.Interface) -> list[SubscribedInterface]:
 
         logger.debug(f"process_interface: {bus_name}, {path}, {interface.name}")
 
         new_subscriptions: list[SubscribedInterface] = []
         configured_signals: dict[str, list[dict[str, Any]]] = {}
+        mirror_properties = False
 
         subscription_configs = self.config.get_subscription_configs(bus_name, path)
         for subscription in subscription_configs:
@@ -276,6 +421,8 @@ class DbusClient:
                 if subscription_interface.interface == interface.name:
                     logger.debug(f"matching config found for bus_name={bus_name}, path={path}, interface={interface.name}")
 
+                    mirror_properties |= subscription_interface.mirror_properties
+
                     # Determine signals we need to subscribe to
                     for signal_config in subscription_interface.signals:
                         signal_subscriptions = configured_signals.get(signal_config.signal, [])
@@ -293,6 +440,9 @@ class DbusClient:
                             subscription_config=subscription
                         ))
 
+        if mirror_properties:
+            await self._mirror_interface_properties(bus_name, path, interface.name)
+
         if len(configured_signals) > 0:
 
             signal_subscription_count = await self._subscribe_interface_signals(
@@ -303,6 +453,114 @@ class DbusClient:
 
         return []
 
+    async def _mirror_interface_properties(self, bus_name: str, path: str, interface_name: str):
+        """Seeds the property mirror with GetAll and keeps it up to date from PropertiesChanged signals"""
+
+        key = (bus_name, path, interface_name)
+        if key in self._property_mirror_match_rules:
+            return
+
+        if not self._property_mirror_match_rules:
+            self.bus.add_message_handler(self._property_mirror_message_handler)
+
+        # listen before GetAll so no changes are missed
+        match_rule = (
+            f"type='signal',sender='{bus_name}',path='{path}',interface='org.freedesktop.DBus.Properties',"
+            f"member='PropertiesChanged',arg0='{interface_name}'"
+        )
+        self._property_mirror_match_rules[key] = match_rule
+        try:
+            await self._add_match_rule(match_rule)
+        except Exception as e:
+            logger.warning(f"mirror_interface_properties: AddMatch failed, bus_name={bus_name}, path={path}, interface={interface_name}: {e}")
+            await self._remove_property_mirrors(bus_name, path, interface_name)
+            return
+
+        # mirror from now on, changes signalled while GetAll is in flight win over its result
+        self.property_mirror.set_all(bus_name, path, interface_name, {})
+        generation = self.property_mirror.begin_refetch(bus_name, path, interface_name)
+        try:
+            properties = await self.get_dbus_interface_properties(bus_name, path, interface_name)
+            self.property_mirror.apply_fetched(bus_name, path, interface_name, properties, generation)
+            logger.debug(f"mirror_interface_properties: bus_name={bus_name}, path={path}, interface={interface_name}, properties={list(properties.keys())}")
+        except Exception as e:
+            logger.warning(f"mirror_interface_properties: GetAll failed, bus_name={bus_name}, path={path}, interface={interface_name}: {e}")
+            self.property_mirror.remove(bus_name, path, interface_name)
+        finally:
+            self.property_mirror.end_refetch(bus_name, path, interface_name)
+
+    async def _remove_property_mirrors(self, bus_name: str, path: str | None = None, interface_name: str | None = None):
+
+        keys = [
+            k for k in self._property_mirror_match_rules.keys()
+            if k[0] == bus_name and (path is None or k[1] == path) and (interface_name is None or k[2] == interface_name)
+        ]
+        match_rules = [self._property_mirror_match_rules.pop(key) for key in keys]
+
+        if keys and not self._property_mirror_match_rules:
+            self.bus.remove_message_handler(self._property_mirror_message_handler)
+
+        self.property_mirror.remove(bus_name, path, interface_name)
+
+        # mirror state is gone before awaiting the bus, signals received in the meantime are ignored
+        for match_rule in match_rules:
+            try:
+                await self._remove_match_rule(match_rule)
+            except Exception as e:
+                logger.debug(f"remove_property_mirrors: RemoveMatch failed, bus_name={bus_name}, match_rule={match_rule}: {e}")
+
+    def _property_mirror_message_handler(self, message: dbus_message.Message) -> None:
+
+        if message.message_type != dbus_constants.MessageType.SIGNAL \
+                or message.member != 'PropertiesChanged' or message.interface != 'org.freedesktop.DBus.Properties':
+            return
+
+        interface_name, changed_properties, invalidated_properties = message.body
+        bus_name = self.get_well_known_bus_name(message.sender)
+
+        updated = self.property_mirror.update(
+            bus_name, message.path, interface_name, unwrap_dbus_object(changed_properties), invalidated_properties
+        )
+
+        if updated:
+            for property in invalidated_properties:
+                generation = self.property_mirror.begin_refetch(bus_name, message.path, interface_name)
+                task = asyncio.create_task(self._refetch_mirrored_property(bus_name, message.path, interface_name, property, generation))
+                self._property_refetch_tasks.add(task)
+                task.add_done_callback(self._property_refetch_tasks.discard)
+
+    async def _refetch_mirrored_property(self, bus_name: str, path: str, interface_name: str, property: str, generation: int):
+        try:
+            reply = await self._call_properties_interface(bus_name, path, 'Get', 'ss', [interface_name, property])
+            self.property_mirror.apply_fetched(bus_name, path, interface_name, {property: unwrap_dbus_object(reply.body[0])}, generation)
+        except Exception as e:
+            logger.debug(f"refetch_mirrored_property failed, bus_name={bus_name}, path={path}, interface={interface_name}, property={property}: {e}")
+        finally:
+            self.property_mirror.end_refetch(bus_name, path, interface_name)
+
+    async def _call_properties_interface(self, bus_name: str, path: str, member: str, signature: str, body: list[Any]) -> dbus_message.Message:
+
+        reply = await self.bus.call(dbus_message.Message(
+            destination=bus_name,
+            path=path,
+            interface='org.freedesktop.DBus.Properties',
+            member=member,
+            signature=signature,
+            body=body
+        ))
+
+        assert reply is not None
+        if reply.message_type == dbus_constants.MessageType.ERROR:
+            raise DBusError._from_message(reply)
+
+        return reply
+
+    async def get_dbus_interface_properties(self, bus_name: str, path: str, interface_name: str) -> dict[str, Any]:
+        """Returns all properties of an interface using org.freedesktop.DBus.Properties.GetAll"""
+
+        reply = await self._call_properties_interface(bus_name, path, 'GetAll', 's', [interface_name])
+        return unwrap_dbus_object(reply.body[0])
+
     async def _introspect(self, bus_name: str, path: str) -> dbus_introspection.Node:
 
         if path == "/org/mpris/MediaPlayer2" and bus_name.startswith("org.mpris.MediaPlayer2.vlc"):
@@ -311,7 +569,7 @@ class DbusClient:
             # Until vlc 4.x is out we use the official specification instead
             introspection = mpris_introspection_vlc
         else:
-            introspection = await self.bus.introspect(bus_name, path)
+            introspection = await self._introspect_cached(bus_name, path)
 
         # MPRIS: If no introspection data is available, load a default
         if path == "/org/mpris/MediaPlayer2" and bus_name.startswith("org.mpris.MediaPlayer2.") and len(introspection.interfaces) == 0:
@@ -319,13 +577,40 @@ class DbusClient:
 
         return introspection
 
-    async def _list_bus_name_paths(self, bus_name: str, path: str) -> list[str]:
-        """list all nested paths. Only paths that have interfaces are returned"""
+    async def _introspect_cached(self, bus_name: str, path: str, timeout: float = 30) -> dbus_introspection.Node:
+        """Introspects the object at bus_name and path, using the introspection cache"""
+
+        introspection = self.introspection_cache.get(bus_name, path)
+        if introspection is not None:
+            return introspection
+
+        reply = await asyncio.wait_for(self.bus.call(dbus_message.Message(
+            destination=bus_name,
+            path=path,
+            interface='org.freedesktop.DBus.Introspectable',
+            member='Introspect'
+        )), timeout=timeout)
+
+        assert reply is not None
+        if reply.message_type == dbus_constants.MessageType.ERROR:
+            raise DBusError._from_message(reply)
+
+        return self.introspection_cache.put(bus_name, path, reply.body[0])
+
+    async def _list_bus_name_paths(self, bus_name: str, path: str, path_patterns: list[str] | None = None, semaphore: asyncio.Semaphore | None = None) -> list[str]:
+        """list all nested paths. Only paths that have interfaces are returned.
+        Child nodes are introspected concurrently, limited by dbus.introspection_concurrency.
+        When path_patterns are given, subtrees that cannot match any of the patterns are skipped.
+        """
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.config.introspection_concurrency))
 
         paths: list[str] = []
 
         try:
-            introspection = await self._introspect(bus_name, path)
+            async with semaphore:
+                introspection = await self._introspect(bus_name, path)
         except TypeError as e:
             logger.warning(f"bus.introspect failed, bus_name={bus_name}, path={path}: {e}")
             return paths
@@ -336,14 +621,45 @@ class DbusClient:
         if len(introspection.interfaces) > 0:
             paths.append(path)
 
-        for node in introspection.nodes:
-            path_seperator = "" if path.endswith('/') else "/"
-            paths.extend(
-                await self._list_bus_name_paths(bus_name, f"{path}{path_seperator}{node.name}")
-            )
+        path_seperator = "" if path.endswith('/') else "/"
+        child_paths = [f"{path}{path_seperator}{node.name}" for node in introspection.nodes]
+        if path_patterns is not None:
+            child_paths = [p for p in child_paths if any(path_subtree_may_match(p, pattern) for pattern in path_patterns)]
+
+        child_results = await asyncio.gather(*[
+            self._list_bus_name_paths(bus_name, child_path, path_patterns, semaphore) for child_path in child_paths
+        ])
+        for child_result in child_results:
+            paths.extend(child_result)
 
         return paths
 
+    async def _list_managed_object_paths(self, bus_name: str, path_patterns: list[str]) -> list[str] | None:
+        """list all paths using org.freedesktop.DBus.ObjectManager.GetManagedObjects in a single call.
+        Candidate ObjectManager paths are tried top-down, starting with '/', limited to paths that are
+        a parent of all path_patterns. Returns None if the bus_name doesn't implement an ObjectManager.
+        """
+
+        for manager_path in object_manager_candidate_paths(path_patterns):
+            try:
+                reply = await self.bus.call(dbus_message.Message(
+                    destination=bus_name,
+                    path=manager_path,
+                    interface='org.freedesktop.DBus.ObjectManager',
+                    member='GetManagedObjects'
+                ))
+            except Exception as e:
+                logger.debug(f"GetManagedObjects failed, bus_name={bus_name}, path={manager_path}: {e}")
+                continue
+
+            if reply and reply.message_type == dbus_constants.MessageType.METHOD_RETURN:
+                managed_paths = list(reply.body[0].keys())
+                logger.debug(f"GetManagedObjects: bus_name={bus_name}, path={manager_path}, managed_paths={len(managed_paths)}")
+                # the ObjectManager object itself is not part of the managed objects
+                return [manager_path, *managed_paths]
+
+        return None
+
     async def _subscribe_dbus_object(self, bus_name: str, path: str) -> list[SubscribedInterface]:
         """Subscribes to a dbus object at the given bus_name and path.
         For each matching subscription config, subscribe to all configured interfaces,
@@ -384,6 +700,7 @@ class DbusClient:
             return []
 
         object_paths = []
+        path_patterns = []
         subscription_configs = self.config.get_subscription_configs(bus_name=bus_name)
         for subscription_config in subscription_configs:
 
@@ -391,13 +708,20 @@ class DbusClient:
             if "*" not in subscription_config.path:
                 object_paths.append(subscription_config.path)
             else:
-                # if configured path is a wildcard, use introspection to find all paths
-                # and filter by subscription_config.path
-                introspected_paths = await self._list_bus_name_paths(bus_name, "/")
-                logger.debug(f"introspected paths for bus_name: {bus_name}, paths: {introspected_paths}")
-                for path in introspected_paths:
-                    if fnmatch.fnmatchcase(path, subscription_config.path):
-                        object_paths.append(path)
+                path_patterns.append(subscription_config.path)
+
+        if path_patterns:
+            # if configured paths contain wildcards, use introspection to find all paths
+            # and filter by the configured paths. The object tree is walked once for all subscriptions
+            introspected_paths = None
+            if self.config.object_manager_discovery:
+                introspected_paths = await self._list_managed_object_paths(bus_name, path_patterns)
+            if introspected_paths is None:
+                introspected_paths = await self._list_bus_name_paths(bus_name, "/", path_patterns)
+            logger.debug(f"introspected paths for bus_name: {bus_name}, paths: {introspected_paths}")
+            for path in introspected_paths:
+                if any(fnmatch.fnmatchcase(path, path_pattern) for path_pattern in path_patterns):
+                    object_paths.append(path)
 
         # dedupe
         object_paths = list(set(object_paths))
@@ -439,23 +763,37 @@ class DbusClient:
 
 
                 # Wait for completion
-                await self.event_broker.flow_trigger_queue.async_q.join()
+                await self.event_broker.flow_trigger_queue.join()
+
+            await self._discard_bus_name_subscriptions(bus_name)
 
-                # clean up all dbus matchrules
-                for interface in proxy_object._interfaces.values():
-                    proxy_interface: dbus_aio.proxy_object.ProxyInterface = interface
+    async def _discard_bus_name_subscriptions(self, bus_name: str):
+        """Removes all subscription state of a bus_name from the bus and dbus2mqtt, without triggering any flows"""
 
-                    # officially you should do 'off_...' but the below is easier
-                    # proxy_interface.off_properties_changed(self.on_properties_changed)
+        bus_name_subscriptions = self.subscriptions.pop(bus_name, None)
+        if not bus_name_subscriptions:
+            return
 
-                    # clean lingering interface matchrule from bus
-                    if proxy_interface._signal_match_rule in self.bus._match_rules.keys():
-                        self.bus._remove_match_rule(proxy_interface._signal_match_rule)
+        for path, proxy_object in bus_name_subscriptions.path_objects.items():
 
-                    # clean lingering interface messgage handler from bus
-                    self.bus.remove_message_handler(proxy_interface._message_handler)
+            # clean up all dbus matchrules
+            for interface in proxy_object._interfaces.values():
+                proxy_interface: dbus_aio.proxy_object.ProxyInterface = interface
 
-            del self.subscriptions[bus_name]
+                # officially you should do 'off_...' but the below is easier
+                # proxy_interface.off_properties_changed(self.on_properties_changed)
+
+                # clean lingering interface matchrule from bus
+                if proxy_interface._signal_match_rule in self.bus._match_rules.keys():
+                    self.bus._remove_match_rule(proxy_interface._signal_match_rule)
+
+                # clean lingering interface messgage handler from bus
+                self.bus.remove_message_handler(proxy_interface._message_handler)
+
+            self.command_routes.remove_object(bus_name, path)
+
+        self.signal_coalescer.remove(bus_name)
+        await self._remove_property_mirrors(bus_name)
 
     async def _handle_interfaces_added(self, bus_name: str, path: str) -> None:
         """
@@ -498,7 +836,7 @@ class DbusClient:
         if proxy_object is not None:
 
             # Wait for completion
-            await self.event_broker.flow_trigger_queue.async_q.join()
+            await self.event_broker.flow_trigger_queue.join()
 
             # clean up all dbus matchrules
             for interface in proxy_object._interfaces.values():
@@ -516,6 +854,9 @@ class DbusClient:
 
             # For now that InterfacesRemoved signal means the entire object is removed from D-Bus
             del self.subscriptions[bus_name].path_objects[path]
+            self.command_routes.remove_object(bus_name, path)
+            self.signal_coalescer.remove(bus_name, path)
+            await self._remove_property_mirrors(bus_name, path)
 
         # cleanup the entire BusNameSubscriptions if no more objects are subscribed
         bus_name_subscriptions = self.get_bus_name_subscriptions(bus_name)
@@ -601,7 +942,7 @@ class DbusClient:
             for trigger in flow.triggers:
                 if trigger.type == type:
                     trigger_message = FlowTriggerMessage(flow, trigger, datetime.now(), context)
-                    await self.event_broker.flow_trigger_queue.async_q.put(trigger_message)
+                    await self.event_broker.flow_trigger_queue.put(trigger_message)
 
     async def _trigger_bus_name_added(self, subscription_config: SubscriptionConfig, bus_name: str, path: str):
 
@@ -693,16 +1034,16 @@ class DbusClient:
     async def dbus_signal_queue_processor_task(self):
         """Continuously processes messages from the async queue."""
         while True:
-            signal = await self._dbus_signal_queue.async_q.get()
+            signal = await self._dbus_signal_queue.get()
             await self._handle_on_dbus_signal(signal)
-            self._dbus_signal_queue.async_q.task_done()
+            self._dbus_signal_queue.task_done()
 
     async def dbus_object_lifecycle_signal_processor_task(self):
         """Continuously processes messages from the async queue."""
         while True:
-            message = await self._dbus_object_lifecycle_signal_queue.async_q.get()
+            message = await self._dbus_object_lifecycle_signal_queue.get()
             await self._handle_dbus_object_lifecycle_signal(message)
-            self._dbus_object_lifecycle_signal_queue.async_q.task_done()
+            self._dbus_object_lifecycle_signal_queue.task_done()
 
     async def _handle_on_dbus_signal(self, signal: DbusSignalWithState):
 
@@ -726,21 +1067,32 @@ class DbusClient:
                                 "signal": signal.signal_config.signal,
                                 "args": signal.args
                             }
-                            trigger_message = FlowTriggerMessage(
-                                flow,
-                                trigger,
-                                datetime.now(),
-                                trigger_context=trigger_context
-                            )
-
-                            await self.event_broker.flow_trigger_queue.async_q.put(trigger_message)
+                            await self.signal_coalescer.submit(flow, trigger, trigger_context)
                     except Exception as e:
                         logger.warning(f"dbus_signal_queue_processor_task: Exception {e}", exc_info=True)
 
+    async def _emit_dbus_signal_trigger(self, flow: FlowConfig, trigger: FlowTriggerDbusSignalConfig, trigger_context: dict[str, Any]):
+
+        trigger_message = FlowTriggerMessage(
+            flow,
+            trigger,
+            datetime.now(),
+            trigger_context=trigger_context
+        )
+
+        await self.event_broker.flow_trigger_queue.put(trigger_message)
+
     async def _handle_dbus_object_lifecycle_signal(self, message: dbus_message.Message):
 
         if message.member == 'NameOwnerChanged':
             name, old_owner, new_owner = message.body
+            self.name_owners.set_owner(name, new_owner)
+
+            # the service behind this name changed, cached introspection data may be outdated
+            self.introspection_cache.invalidate(name)
+            if old_owner:
+                self.introspection_cache.invalidate(old_owner)
+
             if new_owner != '' and old_owner == '':
                 await self._handle_bus_name_added(name)
             if old_owner != '' and new_owner == '':
@@ -750,11 +1102,16 @@ class DbusClient:
             bus_name = self.get_well_known_bus_name(message.sender)
             if message.member == 'InterfacesAdded':
                 path = message.body[0]
+                self.introspection_cache.invalidate(bus_name, path)
                 await self._handle_interfaces_added(bus_name, path)
             elif message.member == 'InterfacesRemoved':
                 path = message.body[0]
+                self.introspection_cache.invalidate(bus_name, path)
                 await self._handle_interfaces_removed(bus_name, path)
 
+        # bursts of lifecycle signals result in a single save
+        self.introspection_cache.schedule_save()
+
     async def _on_mqtt_msg(self, msg: MqttMessage, hints: MqttReceiveHints):
         """Executes dbus method calls or property updates on objects when messages have
         1. a matching subscription configured
@@ -763,13 +1120,7 @@ class DbusClient:
         4. a matching path (if provided)
         """
 
-        found_matching_topic = False
-        for subscription_configs in self.config.subscriptions:
-            for interface_config in subscription_configs.interfaces:
-                mqtt_topic = interface_config.render_mqtt_command_topic(self.templating, {})
-                found_matching_topic |= mqtt_topic == msg.topic
-
-        if not found_matching_topic:
+        if not self.command_routes.is_command_topic(msg.topic):
             return
 
         logger.debug(f"on_mqtt_msg: topic={msg.topic}, payload={json.dumps(msg.payload)}")
@@ -790,65 +1141,72 @@ class DbusClient:
                 logger.info(f"on_mqtt_msg: Unsupported payload, missing 'method' or 'property/value', got method={payload_method}, property={payload_property}, value={payload_value} from {msg.payload}")
             return
 
-        for [bus_name, bus_name_subscription] in self.subscriptions.items():
-            if fnmatch.fnmatchcase(bus_name, payload_bus_name):
-                for [path, proxy_object] in bus_name_subscription.path_objects.items():
-                    if fnmatch.fnmatchcase(path, payload_path):
-                        for subscription_configs in self.config.get_subscription_configs(bus_name=bus_name, path=path):
-                            for interface_config in subscription_configs.interfaces:
-
-                                for method in interface_config.methods:
-                                    # filter configured method, configured topic, ...
-                                    if method.method == payload_method:
-                                        interface = proxy_object.get_interface(name=interface_config.interface)
-                                        matched_method = True
-
-                                        result = None
-                                        error = None
-                                        try:
-                                            logger.info(f"on_mqtt_msg: method={method.method}, args={payload_method_args}, bus_name={bus_name}, path={path}, interface={interface_config.interface}")
-                                            result = await self.call_dbus_interface_method(interface, method.method, payload_method_args)
-
-                                            # Send response if configured
-                                            await self._send_mqtt_response(
-                                                interface_config, result, None, bus_name, path,
-                                                method=method.method, args=payload_method_args
-                                            )
-
-                                        except Exception as e:
-                                            error = e
-                                            logger.warning(f"on_mqtt_msg: Failed calling method={method.method}, args={payload_method_args}, bus_name={bus_name}, exception={e}")
-
-                                            # Send error response if configured
-                                            await self._send_mqtt_response(
-                                                interface_config, None, error, bus_name, path,
-                                                method=method.method, args=payload_method_args
-                                            )
-
-                                for property in interface_config.properties:
-                                    # filter configured property, configured topic, ...
-                                    if property.property == payload_property:
-                                        interface = proxy_object.get_interface(name=interface_config.interface)
-                                        matched_property = True
-
-                                        try:
-                                            logger.info(f"on_mqtt_msg: property={property.property}, value={payload_value}, bus_name={bus_name}, path={path}, interface={interface_config.interface}")
-                                            await self.set_dbus_interface_property(interface, property.property, payload_value)
-
-                                            # Send property set response if configured
-                                            await self._send_mqtt_response(
-                                                interface_config, payload_value, None, bus_name, path,
-                                                property=property.property, value=[payload_value]
-                                            )
-
-                                        except Exception as e:
-                                            logger.warning(f"on_mqtt_msg: property={property.property}, value={payload_value}, bus_name={bus_name} failed, exception={e}")
-
-                                            # Send property set error response if configured
-                                            await self._send_mqtt_response(
-                                                interface_config, None, e, bus_name, path,
-                                                property=property.property, value=[payload_value],
-                                            )
+        def _matches_payload(bus_name: str, path: str) -> bool:
+            return (payload_bus_name == "*" or fnmatch.fnmatchcase(bus_name, payload_bus_name)) \
+                and (payload_path == "*" or fnmatch.fnmatchcase(path, payload_path))
+
+        if payload_method is not None:
+            for route in self.command_routes.get_method_routes(payload_method):
+                if not _matches_payload(route.bus_name, route.path):
+                    continue
+
+                bus_name = route.bus_name
+                path = route.path
+                interface_config = route.interface_config
+                interface = route.proxy_object.get_interface(name=interface_config.interface)
+                matched_method = True
+
+                result = None
+                error = None
+                try:
+                    logger.info(f"on_mqtt_msg: method={payload_method}, args={payload_method_args}, bus_name={bus_name}, path={path}, interface={interface_config.interface}")
+                    result = await self.call_dbus_interface_method(interface, payload_method, payload_method_args)
+
+                    # Send response if configured
+                    await self._send_mqtt_response(
+                        interface_config, result, None, bus_name, path,
+                        method=payload_method, args=payload_method_args
+                    )
+
+                except Exception as e:
+                    error = e
+                    logger.warning(f"on_mqtt_msg: Failed calling method={payload_method}, args={payload_method_args}, bus_name={bus_name}, exception={e}")
+
+                    # Send error response if configured
+                    await self._send_mqtt_response(
+                        interface_config, None, error, bus_name, path,
+                        method=payload_method, args=payload_method_args
+                    )
+
+        if payload_property is not None:
+            for route in self.command_routes.get_property_routes(payload_property):
+                if not _matches_payload(route.bus_name, route.path):
+                    continue
+
+                bus_name = route.bus_name
+                path = route.path
+                interface_config = route.interface_config
+                interface = route.proxy_object.get_interface(name=interface_config.interface)
+                matched_property = True
+
+                try:
+                    logger.info(f"on_mqtt_msg: property={payload_property}, value={payload_value}, bus_name={bus_name}, path={path}, interface={interface_config.interface}")
+                    await self.set_dbus_interface_property(interface, payload_property, payload_value)
+
+                    # Send property set response if configured
+                    await self._send_mqtt_response(
+                        interface_config, payload_value, None, bus_name, path,
+                        property=payload_property, value=[payload_value]
+                    )
+
+                except Exception as e:
+                    logger.warning(f"on_mqtt_msg: property={payload_property}, value={payload_value}, bus_name={bus_name} failed, exception={e}")
+
+                    # Send property set error response if configured
+                    await self._send_mqtt_response(
+                        interface_config, None, e, bus_name, path,
+                        property=payload_property, value=[payload_value],
+                    )
 
         if not matched_method and not matched_property and hints.log_unmatched_message:
             if payload_method:
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+
+import dbus_fast.aio as dbus_aio
+
+from dbus2mqtt.config import DbusConfig, InterfaceConfig
+from dbus2mqtt.template.templating import TemplateEngine
+
+
+@dataclass
+class CommandRoute:
+    bus_name: str
+    path: str
+    proxy_object: dbus_aio.proxy_object.ProxyObject
+    interface_config: InterfaceConfig
+
+class DbusCommandRoutes:
+    """Routing table for MQTT commands to subscribed D-Bus objects.
+
+    Routes are keyed by method and property name and are updated when objects are added or removed,
+    so commands resolve their targets without scanning subscriptions. Like before routing was introduced,
+    a message on any configured mqtt_command_topic reaches the matching methods and properties of all
+    configured interfaces, also those configured with another or without mqtt_command_topic.
+    Configured command topics are rendered once with an empty context.
+    """
+
+    def __init__(self, config: DbusConfig, templating: TemplateEngine):
+        self.config = config
+        self.templating = templating
+
+        self._command_topics: dict[int, tuple[InterfaceConfig, str | None]] = {}
+        self._configured_topics: set[str] = set()
+        self._configured_version: int | None = None
+
+        self._method_routes: dict[str, list[CommandRoute]] = {}
+        self._property_routes: dict[str, list[CommandRoute]] = {}
+        self._object_keys: dict[tuple[str, str], list[tuple[dict[str, list[CommandRoute]], str]]] = {}
+
+    def _get_command_topic(self, interface_config: InterfaceConfig) -> str | None:
+        cached = self._command_topics.get(id(interface_config))
+        if cached is None or cached[0] is not interface_config:
+            cached = (interface_config, interface_config.render_mqtt_command_topic(self.templating, {}))
+            self._command_topics[id(interface_config)] = cached
+        return cached[1]
+
+    def is_command_topic(self, topic: str) -> bool:
+        """Returns True if topic is a configured mqtt_command_topic"""
+
+        # configured topics are only rendered again after DbusConfig.subscriptions_changed
+        version = self.config.version
+        if self._configured_version != version:
+            self._configured_topics = {
+                t for subscription in self.config.subscriptions for interface_config in subscription.interfaces
+                if (t := self._get_command_topic(interface_config))
+            }
+            self._configured_version = version
+
+        return topic in self._configured_topics
+
+    def add_object(self, bus_name: str, path: str, proxy_object: dbus_aio.proxy_object.ProxyObject):
+        """Adds routes for all configured methods and properties of a subscribed object"""
+
+        self.remove_object(bus_name, path)
+
+        object_keys = []
+        for subscription_config in self.config.get_subscription_configs(bus_name=bus_name, path=path):
+            for interface_config in subscription_config.interfaces:
+                route = CommandRoute(bus_name, path, proxy_object, interface_config)
+                for method in interface_config.methods:
+                    key = method.method
+                    self._method_routes[key] = [*self._method_routes.get(key, []), route]
+                    object_keys.append((self._method_routes, key))
+                for property in interface_config.properties:
+                    key = property.property
+                    self._property_routes[key] = [*self._property_routes.get(key, []), route]
+                    object_keys.append((self._property_routes, key))
+
+        if object_keys:
+            self._object_keys[(bus_name, path)] = object_keys
+
+    def remove_object(self, bus_name: str, path: str):
+        """Removes all routes of a previously added object"""
+
+        # route lists are replaced instead of modified, commands in progress keep iterating a consistent list
+
+        for routes, key in self._object_keys.pop((bus_name, path), []):
+            remaining = [r for r in routes.get(key, []) if r.bus_name != bus_name or r.path != path]
+            if remaining:
+                routes[key] = remaining
+            else:
+                routes.pop(key, None)
+
+    def get_method_routes(self, method: str) -> list[CommandRoute]:
+        return self._method_routes.get(method, [])
+
+    def get_property_routes(self, property: str) -> list[CommandRoute]:
+        return self._property_routes.get(property, [])
@@ -0,0 +1,61 @@
+from jinja2 import nodes
+
+from dbus2mqtt.template.templating import TemplateEngine
+
+
+def _parse_arg_equality(node: nodes.Node, res: dict[int, str]) -> bool:
+
+    if isinstance(node, nodes.And):
+        return _parse_arg_equality(node.left, res) and _parse_arg_equality(node.right, res)
+
+    if not isinstance(node, nodes.Compare) or len(node.ops) != 1 or node.ops[0].op != "eq":
+        return False
+
+    left, right = node.expr, node.ops[0].expr
+    if isinstance(left, nodes.Const):
+        left, right = right, left
+
+    if not (
+        isinstance(left, nodes.Getitem)
+        and isinstance(left.node, nodes.Name) and left.node.name == "args"
+        and isinstance(left.arg, nodes.Const) and isinstance(left.arg.value, int) and not isinstance(left.arg.value, bool)
+        and isinstance(right, nodes.Const) and isinstance(right.value, str)
+    ):
+        return False
+
+    index = left.arg.value
+    if index < 0 or index > 63 or res.get(index, right.value) != right.value:
+        return False
+
+    res[index] = right.value
+    return True
+
+def parse_signal_filter_args(template_engine: TemplateEngine, filter: str) -> dict[int, str] | None:
+    """Returns {arg_index: value} when filter only consists of string equality checks on args, e.g.
+    "{{ args[0] == 'org.mpris.MediaPlayer2.Player' }}". Returns None for any other filter.
+    """
+
+    try:
+        template = template_engine.jinja2_env.parse(filter)
+    except Exception:
+        return None
+
+    if len(template.body) != 1 or not isinstance(template.body[0], nodes.Output) or len(template.body[0].nodes) != 1:
+        return None
+
+    res: dict[int, str] = {}
+    if not _parse_arg_equality(template.body[0].nodes[0], res):
+        return None
+    return res
+
+def _escape_match_rule_value(value: str) -> str:
+    # match rule values are quoted with ', an embedded ' is written as '\''
+    return value.replace("'", "'\\''")
+
+def build_signal_match_rule(base_match_rule: str, member: str, arg_values: dict[int, str]) -> str:
+    """Narrows a signal match rule to a single member and argN values, so the bus daemon drops unwanted signals"""
+
+    clauses = [base_match_rule, f"member='{_escape_match_rule_value(member)}'"]
+    for index, value in sorted(arg_values.items()):
+        clauses.append(f"arg{index}='{_escape_match_rule_value(value)}'")
+    return ",".join(clauses)
@@ -29,6 +29,39 @@ def unwrap_dbus_objects(args):
 def camel_to_snake(name):
     return re.sub(r'([a-z])([A-Z])', r'\1_\2', name).lower()
 
+def _literal_path_prefix(path_pattern: str) -> str:
+    """Returns the literal part of a fnmatch path pattern up to the first wildcard"""
+    wildcard_index = min((i for i in (path_pattern.find(c) for c in "*?[") if i >= 0), default=len(path_pattern))
+    return path_pattern[:wildcard_index]
+
+def path_subtree_may_match(path: str, path_pattern: str) -> bool:
+    """Returns False when neither path nor any of its child paths can match the fnmatch path_pattern"""
+
+    literal_prefix = _literal_path_prefix(path_pattern)
+
+    if path.startswith(literal_prefix):
+        return True
+
+    # path is still above the literal prefix, only descend into the matching branch
+    subtree_prefix = path if path.endswith("/") else f"{path}/"
+    return literal_prefix == path or literal_prefix.startswith(subtree_prefix)
+
+def object_manager_candidate_paths(path_patterns: list[str]) -> list[str]:
+    """Returns the paths, top-down from '/', that are a parent of all given fnmatch path patterns"""
+
+    # only complete path elements in front of the first wildcard are known
+    patterns_parts = [[p for p in _literal_path_prefix(pattern).split("/")[:-1] if p] for pattern in path_patterns]
+
+    candidates = ["/"]
+    if not patterns_parts:
+        return candidates
+
+    for index, part in enumerate(patterns_parts[0]):
+        if any(len(parts) <= index or parts[index] != part for parts in patterns_parts):
+            break
+        candidates.append("/" + "/".join(patterns_parts[0][:index + 1]))
+    return candidates
+
 def _convert_value_to_dbus(value: Any) -> Any:
     """
     Recursively convert a single value to D-Bus compatible type.
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from typing import Any
+
+import dbus_fast.introspection as dbus_introspection
+
+logger = logging.getLogger(__name__)
+
+class IntrospectionCache:
+    """Cache of parsed introspection data.
+
+    Parsed nodes are shared by XML hash, so objects with identical introspection XML are parsed once.
+    XML hashes are looked up by (bus_name, path) and expire after ttl seconds. XML and parsed nodes are
+    dropped once no entry refers to them anymore. Entries for well-known bus_names can optionally be
+    persisted to disk, so restarts can skip introspecting stable services.
+    """
+
+    def __init__(self, ttl: float, cache_file: str | None = None):
+        self.ttl = ttl
+        self.cache_file = cache_file
+
+        self._nodes: dict[str, dbus_introspection.Node] = {}
+        self._xml: dict[str, str] = {}
+        self._refs: dict[str, int] = {}
+        self._entries: dict[tuple[str, str], tuple[str, float]] = {}
+        self._dirty = False
+        self._save_task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, bus_name: str, path: str) -> dbus_introspection.Node | None:
+
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get((bus_name, path))
+        if entry is None:
+            return None
+
+        xml_hash, timestamp = entry
+        if time.time() - timestamp > self.ttl:
+            self._remove_entry((bus_name, path))
+            return None
+
+        return self._get_node(xml_hash)
+
+    def put(self, bus_name: str, path: str, xml: str) -> dbus_introspection.Node:
+        """Parses the xml, reusing the parsed node of identical xml, and caches it for (bus_name, path)"""
+
+        if not self.enabled:
+            return dbus_introspection.Node.parse(xml)
+
+        xml_hash = hashlib.sha1(xml.encode()).hexdigest()
+        self._add_entry((bus_name, path), xml_hash, xml, time.time())
+        self._dirty = True
+
+        return self._get_node(xml_hash)
+
+    def _get_node(self, xml_hash: str) -> dbus_introspection.Node:
+        node = self._nodes.get(xml_hash)
+        if node is None:
+            node = dbus_introspection.Node.parse(self._xml[xml_hash])
+            self._nodes[xml_hash] = node
+        return node
+
+    def _add_entry(self, key: tuple[str, str], xml_hash: str, xml: str, timestamp: float):
+
+        # reference the new hash first, the replaced entry may use the same hash
+        self._xml.setdefault(xml_hash, xml)
+        self._refs[xml_hash] = self._refs.get(xml_hash, 0) + 1
+
+        self._remove_entry(key)
+        self._entries[key] = (xml_hash, timestamp)
+
+    def _remove_entry(self, key: tuple[str, str]) -> bool:
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        xml_hash = entry[0]
+        refs = self._refs.get(xml_hash, 0) - 1
+        if refs > 0:
+            self._refs[xml_hash] = refs
+        else:
+            # no object uses this xml anymore
+            self._refs.pop(xml_hash, None)
+            self._xml.pop(xml_hash, None)
+            self._nodes.pop(xml_hash, None)
+        return True
+
+    def invalidate(self, bus_name: str, path: str | None = None):
+        """Removes cached entries of a bus_name, or of a single path when given"""
+
+        if path is not None:
+            if self._remove_entry((bus_name, path)):
+                self._dirty = True
+            return
+
+        keys = [k for k in self._entries.keys() if k[0] == bus_name]
+        for key in keys:
+            self._remove_entry(key)
+        if keys:
+            self._dirty = True
+
+    def load(self):
+
+        if not self.cache_file or not self.enabled or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file) as f:
+                data = json.load(f)
+
+            now = time.time()
+            for entry in data.get("entries", []):
+                if now - entry["timestamp"] <= self.ttl:
+                    xml_hash = hashlib.sha1(entry["xml"].encode()).hexdigest()
+                    self._add_entry((entry["bus_name"], entry["path"]), xml_hash, entry["xml"], entry["timestamp"])
+
+            logger.info(f"Loaded {len(self._entries)} introspection cache entries from {self.cache_file}")
+
+        except Exception as e:
+            logger.warning(f"Failed to load introspection cache from {self.cache_file}: {e}")
+
+    def _snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "bus_name": bus_name,
+                "path": path,
+                "timestamp": timestamp,
+                "xml": self._xml[xml_hash],
+            }
+            for (bus_name, path), (xml_hash, timestamp) in self._entries.items()
+            # unique names change on every connect
+            if not bus_name.startswith(":")
+        ]
+
+    def _write(self, entries: list[dict[str, Any]]) -> bool:
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to save introspection cache to {self.cache_file}: {e}")
+            return False
+
+    def save(self):
+        """Saves entries of well-known bus_names when changed since the last save"""
+
+        if not self.cache_file or not self.enabled or not self._dirty:
+            return
+
+        self._dirty = False
+        if not self._write(self._snapshot()):
+            self._dirty = True
+
+    async def async_save(self):
+        """Like save, but writes the file in a worker thread so the event loop isn't blocked"""
+
+        if not self.cache_file or not self.enabled or not self._dirty:
+            return
+
+        # entries are collected on the event loop, only file io runs in the worker thread
+        self._dirty = False
+        if not await asyncio.to_thread(self._write, self._snapshot()):
+            self._dirty = True
+
+    def schedule_save(self, delay: float = 5):
+        """Saves after delay seconds, changes made in the meantime are saved at once"""
+
+        if not self.cache_file or not self.enabled or not self._dirty:
+            return
+
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save(delay))
+
+    async def _delayed_save(self, delay: float):
+        await asyncio.sleep(delay)
+        await self.async_save()
@@ -0,0 +1,37 @@
+class NameOwnerTable:
+    """Bidirectional map of well-known bus_names and their unique name owners.
+
+    Seeded on startup and kept up to date from NameOwnerChanged signals, so name
+    resolution doesn't need any bus traffic.
+    """
+
+    def __init__(self):
+        self._owners: dict[str, str] = {}
+        self._names: dict[str, list[str]] = {}
+
+    def set_owner(self, name: str, owner: str | None):
+        """Updates the owner of a well-known name, an empty owner removes the name"""
+
+        if name.startswith(":"):
+            return
+
+        old_owner = self._owners.pop(name, None)
+        if old_owner is not None:
+            names = self._names.get(old_owner, [])
+            if name in names:
+                names.remove(name)
+            if not names:
+                self._names.pop(old_owner, None)
+
+        if owner:
+            self._owners[name] = owner
+            self._names.setdefault(owner, []).append(name)
+
+    def get_owner(self, name: str) -> str | None:
+        if name.startswith(":"):
+            return name
+        return self._owners.get(name)
+
+    def get_names(self, unique_name: str) -> list[str]:
+        """Returns all well-known names owned by unique_name. The returned list is shared, do not modify it"""
+        return self._names.get(unique_name, [])
@@ -0,0 +1,104 @@
+from typing import Any
+
+_MISSING = object()
+
+class PropertyMirror:
+    """In-process copy of D-Bus properties per (bus_name, path, interface).
+
+    Seeded with GetAll when an interface is subscribed and kept up to date from
+    PropertiesChanged signals. Invalidated properties are removed until they are refetched.
+    Every applied signal increments the generation of the mirror, fetched values of properties
+    changed by a signal after the fetch started are stale and dropped.
+    """
+
+    def __init__(self):
+        self._properties: dict[tuple[str, str, str], dict[str, Any]] = {}
+        self._refetching: dict[tuple[str, str, str], int] = {}
+        self._generations: dict[tuple[str, str, str], int] = {}
+        self._changed_generations: dict[tuple[str, str, str], dict[str, int]] = {}
+        """Generation of the last signal that changed or invalidated each property"""
+
+    def is_mirrored(self, bus_name: str, path: str, interface: str) -> bool:
+        return (bus_name, path, interface) in self._properties
+
+    def set_all(self, bus_name: str, path: str, interface: str, properties: dict[str, Any]):
+        self._properties[(bus_name, path, interface)] = dict(properties)
+
+    def update(self, bus_name: str, path: str, interface: str, changed: dict[str, Any], invalidated: list[str]) -> bool:
+        """Applies a PropertiesChanged signal, returns False when the interface is not mirrored"""
+
+        key = (bus_name, path, interface)
+        properties = self._properties.get(key)
+        if properties is None:
+            return False
+
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        changed_generations = self._changed_generations.setdefault(key, {})
+
+        properties.update(changed)
+        for property in changed.keys():
+            changed_generations[property] = generation
+        for property in invalidated:
+            properties.pop(property, None)
+            changed_generations[property] = generation
+        return True
+
+    def apply_fetched(self, bus_name: str, path: str, interface: str, fetched: dict[str, Any], generation: int):
+        """Applies properties fetched with Get or GetAll, skipping properties changed by a signal after generation"""
+
+        key = (bus_name, path, interface)
+        properties = self._properties.get(key)
+        if properties is None:
+            return
+
+        changed_generations = self._changed_generations.get(key, {})
+        for property, value in fetched.items():
+            if changed_generations.get(property, 0) <= generation:
+                properties[property] = value
+
+    def get(self, bus_name: str, path: str, interface: str, property: str, default: Any = _MISSING) -> Any:
+        """Returns the mirrored property value, raises KeyError when not available and no default is given"""
+
+        value = self._properties.get((bus_name, path, interface), {}).get(property, _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(property)
+            return default
+        return value
+
+    def begin_refetch(self, bus_name: str, path: str, interface: str) -> int:
+        """Marks a property of the interface as being refetched, returns the generation to pass to apply_fetched"""
+        key = (bus_name, path, interface)
+        self._refetching[key] = self._refetching.get(key, 0) + 1
+        return self._generations.get(key, 0)
+
+    def end_refetch(self, bus_name: str, path: str, interface: str):
+        key = (bus_name, path, interface)
+        count = self._refetching.get(key, 0) - 1
+        if count > 0:
+            self._refetching[key] = count
+        else:
+            self._refetching.pop(key, None)
+
+    def get_all(self, bus_name: str, path: str, interface: str) -> dict[str, Any] | None:
+        """Returns a copy of all mirrored properties, None when not mirrored or while a property is being refetched"""
+
+        key = (bus_name, path, interface)
+        properties = self._properties.get(key)
+        if properties is None or key in self._refetching:
+            return None
+        return dict(properties)
+
+    def remove(self, bus_name: str, path: str | None = None, interface: str | None = None):
+        """Removes all mirrored interfaces of a bus_name, or of a single path or interface when given"""
+
+        keys = [
+            k for k in self._properties.keys()
+            if k[0] == bus_name and (path is None or k[1] == path) and (interface is None or k[2] == interface)
+        ]
+        for key in keys:
+            del self._properties[key]
+            self._refetching.pop(key, None)
+            self._generations.pop(key, None)
+            self._changed_generations.pop(key, None)
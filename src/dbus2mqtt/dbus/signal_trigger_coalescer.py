@@ -0,0 +1,122 @@
+import asyncio
+import logging
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from dbus2mqtt.config import FlowConfig, FlowTriggerDbusSignalConfig
+
+logger = logging.getLogger(__name__)
+
+EmitCallback = Callable[[FlowConfig, FlowTriggerDbusSignalConfig, dict[str, Any]], Awaitable[None]]
+
+def merge_signal_args(args: list[Any], new_args: list[Any]) -> list[Any]:
+    """Merges the args of two signals. Dict args are merged, list args are combined and
+    all other args take the latest value, e.g. for PropertiesChanged the changed properties
+    of all signals are merged.
+    """
+
+    if len(args) != len(new_args):
+        return list(new_args)
+
+    res = []
+    for arg, new_arg in zip(args, new_args):
+        if isinstance(arg, dict) and isinstance(new_arg, dict):
+            res.append({**arg, **new_arg})
+        elif isinstance(arg, list) and isinstance(new_arg, list):
+            res.append(arg + [a for a in new_arg if a not in arg])
+        else:
+            res.append(new_arg)
+    return res
+
+@dataclass
+class _CoalescedSignal:
+    flow: FlowConfig
+    trigger: FlowTriggerDbusSignalConfig
+    deadline: float
+    trigger_context: dict[str, Any] | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+class SignalTriggerCoalescer:
+    """Collapses bursts of dbus_signal triggers per (flow, trigger, bus_name, path).
+
+    With debounce, a burst ends after `debounce` seconds without signals. With throttle, triggers
+    are emitted at most once per `throttle` seconds. Triggers are emitted on the leading and/or trailing
+    edge of a burst, the trailing trigger carries the merged args of all signals since the last emit.
+    """
+
+    def __init__(self, emit: EmitCallback):
+        self._emit = emit
+        self._pending: dict[tuple[str, int, str, str], _CoalescedSignal] = {}
+
+    async def submit(self, flow: FlowConfig, trigger: FlowTriggerDbusSignalConfig, trigger_context: dict[str, Any]):
+
+        window = trigger.debounce or trigger.throttle
+        if not window:
+            await self._emit(flow, trigger, trigger_context)
+            return
+
+        loop = asyncio.get_running_loop()
+        key = (flow.id, id(trigger), trigger_context["bus_name"], trigger_context["path"])
+
+        state = self._pending.get(key)
+        if state is not None:
+            if state.trigger_context is None:
+                state.trigger_context = trigger_context
+            else:
+                state.trigger_context = {
+                    **trigger_context,
+                    "args": merge_signal_args(state.trigger_context["args"], trigger_context["args"])
+                }
+            if trigger.debounce:
+                state.deadline = loop.time() + trigger.debounce
+            return
+
+        state = _CoalescedSignal(flow, trigger, loop.time() + window)
+        self._pending[key] = state
+        state.task = asyncio.create_task(self._run_window(key, state))
+
+        if trigger.leading:
+            await self._emit(flow, trigger, trigger_context)
+        else:
+            state.trigger_context = trigger_context
+
+    async def _run_window(self, key: tuple[str, int, str, str], state: _CoalescedSignal):
+
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                delay = state.deadline - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                trigger_context, state.trigger_context = state.trigger_context, None
+                if trigger_context is not None and state.trigger.trailing:
+                    await self._emit(state.flow, state.trigger, trigger_context)
+
+                    # throttled triggers start a new window after a trailing emit to keep the rate bounded
+                    if state.trigger.throttle:
+                        state.deadline = loop.time() + state.trigger.throttle
+                        continue
+
+                # signals received while emitting start a new debounce window
+                if state.trigger_context is not None:
+                    continue
+
+                break
+        except Exception as e:
+            logger.warning(f"signal_trigger_coalescer: Exception {e}", exc_info=True)
+        finally:
+            if self._pending.get(key) is state:
+                del self._pending[key]
+
+    def remove(self, bus_name: str, path: str | None = None):
+        """Drops pending triggers of a bus_name, or of a single path when given"""
+
+        keys = [k for k in self._pending.keys() if k[2] == bus_name and (path is None or k[3] == path)]
+        for key in keys:
+            state = self._pending.pop(key)
+            if state.task:
+                state.task.cancel()
@@ -1,13 +1,21 @@
 import asyncio
 import logging
 
-from dataclasses import dataclass
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
 import janus
 
-from dbus2mqtt.config import FlowConfig, FlowTriggerConfig
+from dbus2mqtt.config import (
+    FlowConfig,
+    FlowProcessorConfig,
+    FlowTriggerConfig,
+    FlowTriggerPriority,
+)
+from dbus2mqtt.mqtt.publish_digest_cache import PublishDigestCache
 
 logger = logging.getLogger(__name__)
 
@@ -28,26 +36,158 @@ class FlowTriggerMessage:
     flow_trigger_config: FlowTriggerConfig
     timestamp: datetime
     trigger_context: dict[str, Any] | None = None
+    on_done: Callable[[], None] | None = field(default=None, repr=False, compare=False)
+    """Called once the trigger is processed or replaced by a newer trigger"""
+
+FLOW_TRIGGER_LANES: tuple[FlowTriggerPriority, ...] = ("high", "normal", "low")
+DEFAULT_FLOW_TRIGGER_PRIORITIES: dict[str, FlowTriggerPriority] = {
+    "mqtt_message": "high",
+    "schedule": "low",
+}
+
+class FlowTriggerQueue(asyncio.Queue[FlowTriggerMessage]):
+    """Flow trigger queue with priority lanes and support for the "latest" queue_mode of flows.
+
+    Triggers are served from the highest priority lane first. A lower priority lane that has been
+    passed over starvation_limit times is served next, so periodic triggers are delayed but never starved.
+
+    A trigger of a "latest" flow replaces a still pending trigger with the same flow, trigger and
+    queue_key values instead of being added, so the backlog stays bounded when flows can't keep up.
+    The replacing trigger keeps the queue position of the pending trigger.
+    """
+
+    def __init__(self, maxsize: int = 0, config: FlowProcessorConfig | None = None):
+        self.config = config or FlowProcessorConfig()
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self._lanes: dict[FlowTriggerPriority, deque[list[FlowTriggerMessage]]] = {lane: deque() for lane in FLOW_TRIGGER_LANES}
+        self._skipped: dict[FlowTriggerPriority, int] = {lane: 0 for lane in FLOW_TRIGGER_LANES}
+        self._size = 0
+        self._pending: dict[tuple, list[FlowTriggerMessage]] = {}
+        self.replaced_count = 0
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def lane_depths(self) -> dict[str, int]:
+        """Returns the number of pending triggers per priority lane"""
+        return {lane: len(queue) for lane, queue in self._lanes.items()}
+
+    def get_priority(self, item: FlowTriggerMessage) -> FlowTriggerPriority:
+
+        trigger = item.flow_trigger_config
+        return (
+            trigger.priority
+            or self.config.priorities.get(trigger.type)
+            or DEFAULT_FLOW_TRIGGER_PRIORITIES.get(trigger.type, "normal")
+        )
+
+    @staticmethod
+    def _coalesce_key(item: FlowTriggerMessage) -> tuple | None:
+
+        flow = item.flow_config
+        if flow.queue_mode != "latest":
+            return None
+
+        context = item.trigger_context or {}
+        return (flow.id, id(item.flow_trigger_config), *(repr(context.get(k)) for k in flow.queue_key))
+
+    def _replace_pending(self, item: FlowTriggerMessage) -> bool:
+
+        key = self._coalesce_key(item)
+        slot = self._pending.get(key) if key is not None else None
+        if slot is None:
+            return False
+
+        replaced, slot[0] = slot[0], item
+        self.replaced_count += 1
+        if replaced.on_done:
+            replaced.on_done()
+        return True
+
+    def _put(self, item: FlowTriggerMessage):
+        slot = [item]
+        key = self._coalesce_key(item)
+        if key is not None:
+            self._pending[key] = slot
+        self._lanes[self.get_priority(item)].append(slot)
+        self._size += 1
+
+    def _select_lane(self) -> FlowTriggerPriority:
+
+        waiting = [lane for lane in FLOW_TRIGGER_LANES if self._lanes[lane]]
+
+        limit = self.config.starvation_limit
+        selected = next((lane for lane in waiting if limit > 0 and self._skipped[lane] >= limit), waiting[0])
+
+        for lane in waiting:
+            self._skipped[lane] = 0 if lane == selected else self._skipped[lane] + 1
+        return selected
+
+    def _get(self) -> FlowTriggerMessage:
+        slot = self._lanes[self._select_lane()].popleft()
+        self._size -= 1
+        key = self._coalesce_key(slot[0])
+        if key is not None and self._pending.get(key) is slot:
+            del self._pending[key]
+        return slot[0]
+
+    def put_nowait(self, item: FlowTriggerMessage):
+        if not self._replace_pending(item):
+            super().put_nowait(item)
+
+    async def put(self, item: FlowTriggerMessage):
+        # replacing never waits for a free slot, even when the queue is full
+        if not self._replace_pending(item):
+            await super().put(item)
 
 class EventBroker:
-    def __init__(self):
+    def __init__(self, flow_processor_config: FlowProcessorConfig | None = None, publish_digest_cache_size: int = 1024):
+        # mqtt_receive_queue is fed by paho's network thread, all other queues are loop-native
         self.mqtt_receive_queue = janus.Queue[tuple[MqttMessage, MqttReceiveHints]]()
-        self.mqtt_publish_queue = janus.Queue[MqttMessage]()
-        self.flow_trigger_queue = janus.Queue[FlowTriggerMessage]()
+        self.mqtt_publish_queue = asyncio.Queue[MqttMessage]()
+        self.flow_trigger_queue = FlowTriggerQueue(config=flow_processor_config)
         # self.dbus_send_queue: janus.Queue
 
+        self.mqtt_publish_digests = PublishDigestCache(publish_digest_cache_size)
+
+        try:
+            self.loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+
     async def close(self):
         await asyncio.gather(
             self.mqtt_receive_queue.aclose(),
-            self.mqtt_publish_queue.aclose(),
-            self.flow_trigger_queue.aclose(),
             return_exceptions=True
         )
 
+    def put_threadsafe(self, queue: asyncio.Queue, item: Any):
+        """Puts item on a loop-native queue. Directly when called from the event loop,
+        otherwise (e.g. from paho's network thread) the put is handed off to the event loop.
+        """
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is not None and (self.loop is None or running_loop is self.loop):
+            queue.put_nowait(item)
+        elif self.loop is not None:
+            self.loop.call_soon_threadsafe(queue.put_nowait, item)
+        else:
+            # asyncio queues are not thread-safe and a direct put would not wake up waiting getters
+            raise RuntimeError("put_threadsafe called outside of the event loop, create the EventBroker on the event loop")
+
     def on_mqtt_receive(self, msg: MqttMessage, hints: MqttReceiveHints):
         # logger.debug("on_mqtt_receive")
         self.mqtt_receive_queue.sync_q.put((msg, hints))
 
     async def publish_to_mqtt(self, msg: MqttMessage):
         # logger.debug("publish_to_mqtt")
-        await self.mqtt_publish_queue.async_q.put(msg)
+        await self.mqtt_publish_queue.put(msg)
@@ -1,7 +1,15 @@
+import asyncio
+
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
 from typing import Any
 
 
+def _retrieve_exception(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
 class FlowExecutionContext:
 
     def __init__(self, name: str | None, global_flows_context: dict[str, Any], flow_context: dict[str, Any]):
@@ -28,6 +36,28 @@ class FlowExecutionContext:
         Cleaned up after each flow execution
         """
 
+        self.memo: dict[Hashable, Any] = {}
+        """
+        Results of D-Bus calls made during this flow execution, see memoize.
+        Cleaned up after each flow execution
+        """
+
+    async def memoize(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of fn, which is only awaited once for each key during this flow execution.
+        Concurrent callers with the same key wait for the same in-flight call.
+        """
+
+        future = self.memo.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            # a failed call may not be awaited by anyone when its callers were cancelled
+            future.add_done_callback(_retrieve_exception)
+            self.memo[key] = future
+
+        # shield, a cancelled caller should not cancel the call for other callers
+        return await asyncio.shield(future)
+
     def get_aggregated_context(self) -> dict[str, Any]:
         """
         Get the aggregated context for the flow execution.
@@ -43,6 +73,9 @@ class FlowExecutionContext:
             context.update(self.context)
         return context
 
+current_flow_execution_context: ContextVar[FlowExecutionContext | None] = ContextVar("current_flow_execution_context", default=None)
+"""FlowExecutionContext of the flow being executed, used by template functions to memoize D-Bus calls"""
+
 class FlowAction(ABC):
 
     @abstractmethod
@@ -17,12 +17,12 @@ class ContextSetAction(FlowAction):
         aggregated_context = context.get_aggregated_context()
 
         if self.config.global_context:
-            context_new = await self.templating.async_render_template(self.config.global_context, dict, aggregated_context)
+            context_new = await self.templating.async_render_template(self.config._global_context_template or self.config.global_context, dict, aggregated_context, concurrency=self.config.render_concurrency)
             logger.debug(f"Update global_context with: {context_new}")
             context.global_flows_context.update(context_new)
 
         if self.config.context:
 
-            context_new = await self.templating.async_render_template(self.config.context, dict, aggregated_context)
+            context_new = await self.templating.async_render_template(self.config._context_template or self.config.context, dict, aggregated_context, concurrency=self.config.render_concurrency)
             logger.debug(f"Update context with: {context_new}")
             context.context.update(context_new)
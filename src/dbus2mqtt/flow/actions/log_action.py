@@ -24,7 +24,7 @@ class LogAction(FlowAction):
 
         try:
             log_msg = await self.templating.async_render_template(
-                templatable=self.config.msg,
+                templatable=self.config._msg_template or self.config.msg,
                 context=render_context,
                 res_type=str
             )
@@ -1,7 +1,7 @@
 
 import logging
 
-from urllib.parse import urlparse
+from urllib.parse import ParseResult, urlparse
 
 from jinja2.exceptions import TemplateError
 
@@ -24,7 +24,7 @@ class MqttPublishAction(FlowAction):
         render_context = context.get_aggregated_context()
 
         try:
-            mqtt_topic = await self.templating.async_render_template(self.config.topic, str, render_context)
+            mqtt_topic = await self.templating.async_render_template(self.config._topic_template or self.config.topic, str, render_context)
 
             if self.config.payload_type == "text":
                 res_type = str
@@ -33,7 +33,7 @@ class MqttPublishAction(FlowAction):
             else:
                 res_type = dict
 
-            payload = await self.templating.async_render_template(self.config.payload_template, res_type, render_context)
+            payload = await self.templating.async_render_template(self.config._payload_template or self.config.payload_template, res_type, render_context, concurrency=self.config.render_concurrency)
 
             # for binary payloads, payload contains the file to read binary data from
             if isinstance(payload, str) and self.config.payload_type == "binary":
@@ -52,6 +52,15 @@ class MqttPublishAction(FlowAction):
             logger.warning(f"Error rendering jinja template, flow: '{context.name or ''}', msg={e} payload_template={self.config.payload_template}, render_context={render_context}")
             return
 
+        publish_digests = self.event_broker.mqtt_publish_digests
+        if self.config.only_on_change and not isinstance(payload, ParseResult):
+            if not publish_digests.should_publish(mqtt_topic, payload, self.config.payload_type, self.config.refresh_interval):
+                logger.debug(f"mqtt_publish: skipping unchanged payload, flow={context.name}, topic={mqtt_topic}")
+                return
+        else:
+            # other publishes to this topic make the last published digest unreliable
+            publish_digests.invalidate(mqtt_topic)
+
         logger.debug(f"public_mqtt: flow={context.name}, payload={payload}")
 
         await self.event_broker.publish_to_mqtt(MqttMessage(mqtt_topic, payload, payload_serialization_type=self.config.payload_type))
@@ -12,13 +12,17 @@ from dbus2mqtt.config import (
     FlowActionLogConfig,
     FlowActionMqttPublishConfig,
     FlowConfig,
-    FlowTriggerConfig,
     FlowTriggerDbusSignalConfig,
     FlowTriggerObjectAddedConfig,
     FlowTriggerObjectRemovedConfig,
+    FlowTriggerScheduleConfig,
+)
+from dbus2mqtt.event_broker import FlowTriggerMessage, FlowTriggerQueue
+from dbus2mqtt.flow import (
+    FlowAction,
+    FlowExecutionContext,
+    current_flow_execution_context,
 )
-from dbus2mqtt.event_broker import FlowTriggerMessage
-from dbus2mqtt.flow import FlowAction, FlowExecutionContext
 from dbus2mqtt.flow.actions.context_set import ContextSetAction
 from dbus2mqtt.flow.actions.log_action import LogAction
 from dbus2mqtt.flow.actions.mqtt_publish import MqttPublishAction
@@ -32,9 +36,30 @@ class FlowScheduler:
         self.event_broker = app_context.event_broker
         self.scheduler = AsyncIOScheduler()
 
-    async def _schedule_flow_strigger(self, flow, trigger_config: FlowTriggerConfig):
-        trigger = FlowTriggerMessage(flow, trigger_config, datetime.now())
-        await self.event_broker.flow_trigger_queue.async_q.put(trigger)
+        # schedule trigger ids with a queued or running flow execution
+        self._pending_triggers: set[str] = set()
+        self.skipped_counts: dict[str, int] = {}
+
+    async def _schedule_flow_strigger(self, flow, trigger_config: FlowTriggerScheduleConfig):
+
+        # skip ticks while the previous execution is still pending, slow flows would otherwise fill up the queue
+        if trigger_config.id in self._pending_triggers:
+            self.skipped_counts[trigger_config.id] = self.skipped_counts.get(trigger_config.id, 0) + 1
+            logger.debug(f"Skipping schedule[{trigger_config.id}] for flow {flow.name or flow.id}, previous execution is still pending, skipped={self.skipped_counts[trigger_config.id]}")
+            return
+
+        self._pending_triggers.add(trigger_config.id)
+        trigger = FlowTriggerMessage(
+            flow,
+            trigger_config,
+            datetime.now(),
+            on_done=lambda: self._pending_triggers.discard(trigger_config.id)
+        )
+        try:
+            await self.event_broker.flow_trigger_queue.put(trigger)
+        except BaseException:
+            self._pending_triggers.discard(trigger_config.id)
+            raise
 
     async def scheduler_task(self):
 
@@ -129,8 +154,12 @@ class FlowActionContext:
         if trigger_context:
             context.context.update(trigger_context)
 
-        for action in self.flow_actions:
-            await action.execute(context)
+        token = current_flow_execution_context.set(context)
+        try:
+            for action in self.flow_actions:
+                await action.execute(context)
+        finally:
+            current_flow_execution_context.reset(token)
 
 class FlowProcessor:
 
@@ -142,6 +171,9 @@ class FlowProcessor:
 
         self._flows: dict[str, FlowActionContext] = {}
 
+        self._ordering_backlogs: dict[tuple, FlowTriggerQueue] = {}
+        self._worker_tasks: set[asyncio.Task] = set()
+
         # register global flows
         self.register_flows(app_context.config.flows)
 
@@ -167,29 +199,100 @@ class FlowProcessor:
             self._flows[flow_config.id] = flow_action_context
 
     async def flow_processor_task(self):
-        """Continuously processes messages from the async queue."""
+        """Continuously processes messages from the async queue.
+
+        Up to flow_processor.workers triggers are processed concurrently. Triggers with the same ordering key
+        are processed in order by a single worker, while triggers with other keys run in parallel.
+        """
 
         # logger.info(f"flow_processor_task: configuring flows={[f.name for f in self.app_context.config.flows]}")
 
+        workers = asyncio.Semaphore(max(1, self.app_context.config.flow_processor.workers))
+
         while True:
-            flow_trigger_message = await self.event_broker.flow_trigger_queue.async_q.get()  # Wait for a message
+            # take a worker slot first, so triggers stay in the queue (and its priority lanes) while all workers are busy
+            await workers.acquire()
             try:
-                await self._process_flow_trigger(flow_trigger_message)
+                flow_trigger_message = await self.event_broker.flow_trigger_queue.get()  # Wait for a message
+            except BaseException:
+                workers.release()
+                raise
 
-            except Exception as e:
-                # exc_info is only set when running in verbose mode to avoid lots of stack traces being printed
-                # while flows are still running and the DBus object was just removed. Some examples:
+            await self._dispatch_flow_trigger(flow_trigger_message, workers)
 
-                log_level = logging.WARN
+    async def _dispatch_flow_trigger(self, flow_trigger_message: FlowTriggerMessage, workers: asyncio.Semaphore):
+        """Hands a trigger to a new worker, or to the backlog of the worker processing its ordering key.
+        Must be called holding a worker slot, which is passed to the new worker or released.
+        """
 
-                # 1: error during context_set
-                # WARNING:dbus2mqtt.flow.flow_processor:flow_processor_task: Exception The name org.mpris.MediaPlayer2.firefox.instance_1_672 was not provided by any .service files
-                if "was not provided by any .service files" in str(e):
-                    log_level = logging.DEBUG
+        config = self.app_context.config.flow_processor
 
-                logger.log(log_level, f"flow_processor_task: Exception {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
-            finally:
-                self.event_broker.flow_trigger_queue.async_q.task_done()
+        while True:
+            key = self._ordering_key(flow_trigger_message)
+            backlog = self._ordering_backlogs.get(key)
+            if backlog is None:
+                self._ordering_backlogs[key] = FlowTriggerQueue(max(1, config.ordering_backlog_size), config=config)
+                task = asyncio.create_task(self._flow_worker(key, flow_trigger_message, workers))
+                self._worker_tasks.add(task)
+                task.add_done_callback(self._worker_tasks.discard)
+                return
+
+            workers.release()
+
+            # a worker is already processing this key, it picks up the trigger when done.
+            # A full backlog holds up the dispatcher, so backpressure reaches the flow trigger queue
+            replaced_count = backlog.replaced_count
+            await backlog.put(flow_trigger_message)
+            if backlog.replaced_count != replaced_count:
+                self.event_broker.flow_trigger_queue.task_done()
+
+            if self._ordering_backlogs.get(key) is backlog or backlog.empty():
+                return
+
+            # the worker drained the backlog and finished while waiting for room, start a new worker
+            flow_trigger_message = backlog.get_nowait()
+            await workers.acquire()
+
+    def _ordering_key(self, msg: FlowTriggerMessage) -> tuple:
+        context = msg.trigger_context or {}
+        return tuple(
+            msg.flow_config.id if k == "flow_id" else repr(context.get(k))
+            for k in self.app_context.config.flow_processor.ordering_key
+        )
+
+    async def _flow_worker(self, key: tuple, flow_trigger_message: FlowTriggerMessage, workers: asyncio.Semaphore):
+        try:
+            while True:
+                await self._process_flow_trigger_message(flow_trigger_message)
+
+                backlog = self._ordering_backlogs[key]
+                if backlog.empty():
+                    del self._ordering_backlogs[key]
+                    break
+                flow_trigger_message = backlog.get_nowait()
+        finally:
+            workers.release()
+
+    async def _process_flow_trigger_message(self, flow_trigger_message: FlowTriggerMessage):
+        try:
+            await self._process_flow_trigger(flow_trigger_message)
+
+        except Exception as e:
+            # exc_info is only set when running in verbose mode to avoid lots of stack traces being printed
+            # while flows are still running and the DBus object was just removed. Some examples:
+
+            log_level = logging.WARN
+
+            # 1: error during context_set
+            # WARNING:dbus2mqtt.flow.flow_processor:flow_processor_task: Exception The name org.mpris.MediaPlayer2.firefox.instance_1_672 was not provided by any .service files
+            if "was not provided by any .service files" in str(e):
+                log_level = logging.DEBUG
+
+            logger.log(log_level, f"flow_processor_task: Exception {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+        finally:
+            if flow_trigger_message.on_done:
+                flow_trigger_message.on_done()
+            self.event_broker.flow_trigger_queue.task_done()
 
     def _trigger_config_to_str(self, msg: FlowTriggerMessage) -> str:
         config = msg.flow_trigger_config
@@ -208,6 +311,9 @@ class FlowProcessor:
         flow_str = flow_trigger_message.flow_config.name or flow_trigger_message.flow_config.id
 
         log_message = f"on_trigger: {trigger_str}, flow={flow_str}, time={flow_trigger_message.timestamp.isoformat()}"
+        if logger.isEnabledFor(logging.DEBUG):
+            # triggers still waiting per priority lane, shows which lanes are falling behind
+            log_message += f", queued={self.event_broker.flow_trigger_queue.lane_depths()}"
 
         if flow_trigger_message.flow_trigger_config.type != "schedule":
             logger.info(log_message)
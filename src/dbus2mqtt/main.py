@@ -1,17 +1,18 @@
 import asyncio
+import dataclasses
 import logging
 import sys
-
-from typing import cast
+import time
 
 import colorlog
 import dbus_fast.aio as dbus_aio
 import dotenv
 
 from dbus_fast import BusType
+from jinja2 import TemplateError
 
 from dbus2mqtt import AppContext
-from dbus2mqtt.config import Config
+from dbus2mqtt.config import Config, compile_config_templates
 from dbus2mqtt.config.jsonarparse import new_argument_parser
 from dbus2mqtt.dbus.dbus_client import DbusClient
 from dbus2mqtt.event_broker import EventBroker
@@ -71,8 +72,16 @@ async def flow_processor_task(app_context: AppContext):
 
 async def run(config: Config):
 
-    event_broker = EventBroker()
-    template_engine = TemplateEngine()
+    event_broker = EventBroker(config.flow_processor, config.mqtt.publish_digest_cache_size)
+    template_engine = TemplateEngine(
+        cache_size=config.templating.cache_size,
+        dict_render_concurrency=config.templating.dict_render_concurrency
+    )
+
+    # Compile all configured templates upfront, invalid templates are reported before anything is started
+    compile_start = time.perf_counter()
+    compile_config_templates(config, template_engine)
+    logger.info(f"Compiled configured templates in {(time.perf_counter() - compile_start) * 1000:.1f}ms")
 
     app_context = AppContext(config, event_broker, template_engine)
 
@@ -105,7 +114,9 @@ def main():
 
     cfg = parser.parse_args()
 
-    config: Config = cast(Config, parser.instantiate_classes(cfg))
+    # instantiate_classes returns a namespace of all arguments, indices built from the config track changes through Config
+    instantiated = parser.instantiate_classes(cfg)
+    config = Config(**{f.name: getattr(instantiated, f.name) for f in dataclasses.fields(Config) if f.init})
 
     class NamePartsFilter(logging.Filter):
         def filter(self, record):
@@ -139,5 +150,8 @@ def main():
 
     try:
         asyncio.run(run(config))
+    except TemplateError as e:
+        logger.error(f"Invalid configuration: {e}")
+        return 1
     except KeyboardInterrupt:
         return 0
@@ -4,6 +4,7 @@ import json
 import logging
 import random
 import string
+import threading
 
 from datetime import datetime
 from typing import Any
@@ -19,17 +20,22 @@ from paho.mqtt.properties import Properties
 from paho.mqtt.subscribeoptions import SubscribeOptions
 
 from dbus2mqtt import AppContext
-from dbus2mqtt.config import FlowConfig, FlowTriggerMqttMessageConfig
 from dbus2mqtt.event_broker import FlowTriggerMessage, MqttMessage, MqttReceiveHints
+from dbus2mqtt.mqtt.mqtt_trigger_index import MqttTriggerIndex
 
 logger = logging.getLogger(__name__)
 
+def _set_future_result(future: asyncio.Future[None]):
+    if not future.done():
+        future.set_result(None)
+
 class MqttClient:
 
     def __init__(self, app_context: AppContext, loop):
         self.app_context = app_context
         self.config = app_context.config.mqtt
         self.event_broker = app_context.event_broker
+        self.trigger_index = MqttTriggerIndex(app_context.config)
 
         unique_client_id_postfix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
         self.client_id_prefix = "dbus2mqtt-"
@@ -48,12 +54,24 @@ class MqttClient:
 
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
+        self.client.on_publish = self.on_publish
 
         self.loop = loop
         self.connected_event = asyncio.Event()
 
+        # publishes are confirmed by paho's network thread, completion is handed back to the loop through futures
+        self._publish_window = asyncio.Semaphore(max(1, self.config.publish_max_inflight))
+        self._publish_lock = threading.Lock()
+        self._publish_futures: dict[int, asyncio.Future[None]] = {}
+        self._published_mids: set[int] = set()
+        self._abandoned_mids: set[int] = set()
+        self._publish_tasks: set[asyncio.Task] = set()
+
     def connect(self):
 
+        # flow triggers received on paho's network thread are handed off to the event broker's loop
+        assert self.event_broker.loop is not None, "EventBroker must be created on the event loop before the MQTT client connects"
+
         self.client.connect_async(
             host=self.config.host,
             port=self.config.port,
@@ -66,7 +84,7 @@ class MqttClient:
 
         """Continuously processes messages from the async queue."""
         while True:
-            msg = await self.event_broker.mqtt_publish_queue.async_q.get()  # Wait for a message
+            msg = await self.event_broker.mqtt_publish_queue.get()  # Wait for a message
 
             try:
                 payload: str | bytes | None = msg.payload
@@ -95,21 +113,77 @@ class MqttClient:
                 publish_properties = Properties(PacketTypes.PUBLISH)
                 publish_properties.UserProperty = ("client_id", self.client_id)
 
-                publish_info = self.client.publish(
-                    topic=msg.topic,
-                    payload=payload or "",
-                    properties=publish_properties
-                )
-                publish_info.wait_for_publish(timeout=1000)
+                # wait for a free slot in the in-flight window, the confirmation is awaited in the background
+                await self._publish_window.acquire()
+                try:
+                    publish_info = self.client.publish(
+                        topic=msg.topic,
+                        payload=payload or "",
+                        properties=publish_properties
+                    )
+                    if publish_info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_AGAIN):
+                        raise RuntimeError(f"Message publish failed: {mqtt.error_string(publish_info.rc)}")
+
+                    future = self._register_publish(publish_info.mid)
+                except BaseException:
+                    self._publish_window.release()
+                    raise
+
+                task = asyncio.create_task(self._await_publish(publish_info.mid, future, msg.topic))
+                self._publish_tasks.add(task)
+                task.add_done_callback(self._publish_tasks.discard)
 
                 if first_message:
                     logger.info(f"First message published: topic={msg.topic}, payload={payload_log_msg}")
                     first_message = False
 
             except Exception as e:
+                # the payload was never sent, make sure mqtt_publish only_on_change doesn't skip it next time
+                self.event_broker.mqtt_publish_digests.invalidate(msg.topic)
                 logger.warning(f"mqtt_publish_queue_processor_task: Exception {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             finally:
-                self.event_broker.mqtt_publish_queue.async_q.task_done()
+                self.event_broker.mqtt_publish_queue.task_done()
+
+    def _register_publish(self, mid: int) -> asyncio.Future[None]:
+
+        future = self.loop.create_future()
+        with self._publish_lock:
+            # paho handed out this mid again, a late confirmation can no longer be told apart
+            self._abandoned_mids.discard(mid)
+
+            # the network thread may have confirmed the message before client.publish returned
+            if mid in self._published_mids:
+                self._published_mids.discard(mid)
+                future.set_result(None)
+            else:
+                self._publish_futures[mid] = future
+        return future
+
+    async def _await_publish(self, mid: int, future: asyncio.Future[None], topic: str):
+        try:
+            await asyncio.wait_for(future, timeout=self.config.publish_timeout)
+        except asyncio.TimeoutError:
+            with self._publish_lock:
+                self._publish_futures.pop(mid, None)
+                self._abandoned_mids.add(mid)
+            self.event_broker.mqtt_publish_digests.invalidate(topic)
+            logger.warning(f"mqtt_publish: message not confirmed within {self.config.publish_timeout}s, topic={topic}")
+        finally:
+            self._publish_window.release()
+
+    def on_publish(self, client: mqtt.Client, userdata, mid: int, reason_code, properties):
+
+        with self._publish_lock:
+            future = self._publish_futures.pop(mid, None)
+            if future is None:
+                if mid in self._abandoned_mids:
+                    # late confirmation of a timed out message
+                    self._abandoned_mids.discard(mid)
+                else:
+                    self._published_mids.add(mid)
+                return
+
+        self.loop.call_soon_threadsafe(_set_future_result, future)
 
     # The callback for when the client receives a CONNACK response from the server.
     def on_connect(self, client: mqtt.Client, userdata, flags, reason_code, properties):
@@ -163,31 +237,29 @@ class MqttClient:
 
     def _trigger_flows(self, topic: str, trigger_context: dict) -> list[FlowTriggerMessage]:
         """Triggers all flows that have a mqtt_trigger defined that matches the given topic
-           and configured filters."""
+           (including '+' and '#' wildcards) and configured filters."""
 
         flow_trigger_messages = []
 
-        all_flows: list[FlowConfig] = []
-        all_flows.extend(self.app_context.config.flows)
-        for subscription in self.app_context.config.dbus.subscriptions:
-            all_flows.extend(subscription.flows)
-
-        for flow in all_flows:
-            for trigger in flow.triggers:
-                if trigger.type == FlowTriggerMqttMessageConfig.type:
-                    matches_filter = trigger.topic == topic
-                    if matches_filter and trigger.filter is not None:
-                        matches_filter = trigger.matches_filter(self.app_context.templating, trigger_context)
-
-                    if matches_filter:
-                        trigger_message = FlowTriggerMessage(
-                            flow,
-                            trigger,
-                            datetime.now(),
-                            trigger_context=trigger_context,
-                        )
-
-                        flow_trigger_messages.append(trigger_message)
-                        self.event_broker.flow_trigger_queue.sync_q.put(trigger_message)
+        for flow, trigger, topic_wildcards in self.trigger_index.get_triggers(topic):
+            flow_trigger_context = {
+                **trigger_context,
+                "topic_wildcards": list(topic_wildcards)
+            }
+
+            matches_filter = True
+            if trigger.filter is not None:
+                matches_filter = trigger.matches_filter(self.app_context.templating, flow_trigger_context)
+
+            if matches_filter:
+                trigger_message = FlowTriggerMessage(
+                    flow,
+                    trigger,
+                    datetime.now(),
+                    trigger_context=flow_trigger_context,
+                )
+
+                flow_trigger_messages.append(trigger_message)
+                self.event_broker.put_threadsafe(self.event_broker.flow_trigger_queue, trigger_message)
 
         return flow_trigger_messages
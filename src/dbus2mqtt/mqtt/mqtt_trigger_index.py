@@ -0,0 +1,132 @@
+from dbus2mqtt.config import Config, FlowConfig, FlowTriggerMqttMessageConfig
+
+MqttTriggerMatch = tuple[FlowConfig, FlowTriggerMqttMessageConfig, list[str]]
+"""(flow, trigger, topic_wildcards) where topic_wildcards holds the topic segments matched by '+' and '#'"""
+
+def has_topic_wildcards(topic: str) -> bool:
+    return "+" in topic or "#" in topic
+
+class _TopicTrieNode:
+
+    __slots__ = ("children", "plus", "hash", "entries")
+
+    def __init__(self):
+        self.children: dict[str, _TopicTrieNode] = {}
+        self.plus: _TopicTrieNode | None = None
+        self.hash: list[tuple[int, FlowConfig, FlowTriggerMqttMessageConfig]] = []
+        self.entries: list[tuple[int, FlowConfig, FlowTriggerMqttMessageConfig]] = []
+
+class _TopicTrie:
+    """Trie of MQTT topic filters, matching cost depends on the topic depth only"""
+
+    def __init__(self):
+        self.root = _TopicTrieNode()
+        self.size = 0
+
+    def add(self, topic_filter: str, order: int, flow: FlowConfig, trigger: FlowTriggerMqttMessageConfig):
+        node = self.root
+        for level in topic_filter.split("/"):
+            if level == "#":
+                node.hash.append((order, flow, trigger))
+                self.size += 1
+                return
+            if level == "+":
+                if node.plus is None:
+                    node.plus = _TopicTrieNode()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _TopicTrieNode())
+        node.entries.append((order, flow, trigger))
+        self.size += 1
+
+    def match(self, topic: str) -> list[tuple[int, FlowConfig, FlowTriggerMqttMessageConfig, list[str]]]:
+        res: list[tuple[int, FlowConfig, FlowTriggerMqttMessageConfig, list[str]]] = []
+        levels = topic.split("/")
+
+        # topics starting with '$' are not matched by wildcards on the first level
+        system_topic = topic.startswith("$")
+
+        def _walk(node: _TopicTrieNode, depth: int, wildcards: list[str]):
+            if node.hash and not (system_topic and depth == 0):
+                # 'a/#' also matches the parent level 'a'
+                remainder = "/".join(levels[depth:])
+                res.extend((order, flow, trigger, [*wildcards, remainder]) for order, flow, trigger in node.hash)
+
+            if depth == len(levels):
+                res.extend((order, flow, trigger, wildcards) for order, flow, trigger in node.entries)
+                return
+
+            level = levels[depth]
+            child = node.children.get(level)
+            if child is not None:
+                _walk(child, depth + 1, wildcards)
+            if node.plus is not None and not (system_topic and depth == 0):
+                _walk(node.plus, depth + 1, [*wildcards, level])
+
+        _walk(self.root, 0, [])
+        return res
+
+class MqttTriggerIndex:
+    """Index of configured mqtt_message triggers by topic.
+
+    Exact topics are kept in a dict, topics containing '+' or '#' wildcards in a topic trie.
+    Built once from the global flows and all subscription flows. The index is rebuilt
+    when the config version changes, see Config.flows_changed and DbusConfig.subscriptions_changed.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._config_version: tuple[int, int] | None = None
+        self._topics: dict[str, list[MqttTriggerMatch]] = {}
+        self._topic_orders: dict[str, list[int]] = {}
+        self._wildcard_topics = _TopicTrie()
+        self.rebuild()
+
+    def _get_flows_lists(self) -> list[list[FlowConfig]]:
+        flows_lists = [self.config.flows]
+        flows_lists.extend(subscription.flows for subscription in self.config.dbus.subscriptions)
+        return flows_lists
+
+    def rebuild(self):
+        """Rebuilds the index from the current config"""
+
+        # read before building, a change made while building triggers another rebuild
+        config_version = self.config.version
+        flows_lists = self._get_flows_lists()
+
+        topics: dict[str, list[MqttTriggerMatch]] = {}
+        topic_orders: dict[str, list[int]] = {}
+        wildcard_topics = _TopicTrie()
+        order = 0
+        for flows in flows_lists:
+            for flow in flows:
+                for trigger in flow.triggers:
+                    if isinstance(trigger, FlowTriggerMqttMessageConfig):
+                        if has_topic_wildcards(trigger.topic):
+                            wildcard_topics.add(trigger.topic, order, flow, trigger)
+                        else:
+                            topics.setdefault(trigger.topic, []).append((flow, trigger, []))
+                            topic_orders.setdefault(trigger.topic, []).append(order)
+                        order += 1
+
+        self._topics = topics
+        self._topic_orders = topic_orders
+        self._wildcard_topics = wildcard_topics
+        self._config_version = config_version
+
+    def get_triggers(self, topic: str) -> list[MqttTriggerMatch]:
+        """Returns all (flow, trigger, topic_wildcards) matches for the given topic in configured order.
+        The returned list may be shared, do not modify it"""
+
+        # a version compare only, flows and triggers are not scanned per message
+        if self._config_version != self.config.version:
+            self.rebuild()
+
+        exact = self._topics.get(topic, [])
+        if self._wildcard_topics.size == 0:
+            return exact
+
+        matches = list(zip(self._topic_orders.get(topic, []), exact))
+        matches.extend((order, (flow, trigger, wildcards)) for order, flow, trigger, wildcards in self._wildcard_topics.match(topic))
+        matches.sort(key=lambda m: m[0])
+        return [match for _, match in matches]
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import time
+
+from collections import OrderedDict
+from typing import Any
+
+
+def payload_digest(payload: Any, payload_serialization_type: str) -> str:
+
+    if isinstance(payload, bytes):
+        data = payload
+    elif isinstance(payload, str):
+        data = payload.encode()
+    else:
+        data = json.dumps(payload, sort_keys=True, default=str).encode()
+
+    return hashlib.blake2b(data, digest_size=16, person=payload_serialization_type.encode()[:16]).hexdigest()
+
+class PublishDigestCache:
+    """Digest and time of the last published payload per topic, used to suppress unchanged payloads.
+
+    Bounded to max_size topics, the least recently published topics are evicted first.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def should_publish(self, topic: str, payload: Any, payload_serialization_type: str, refresh_interval: float | None = None) -> bool:
+        """Returns False when payload equals the last payload published to topic within refresh_interval
+        seconds, otherwise records payload as the last published payload and returns True
+        """
+
+        if self.max_size <= 0:
+            return True
+
+        digest = payload_digest(payload, payload_serialization_type)
+        now = time.monotonic()
+
+        entry = self._entries.get(topic)
+        if entry is not None and entry[0] == digest and (refresh_interval is None or now - entry[1] < refresh_interval):
+            return False
+
+        self._entries[topic] = (digest, now)
+        self._entries.move_to_end(topic)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, topic: str):
+        """Forgets the last published payload of topic, e.g. when publishing it failed"""
+        self._entries.pop(topic, None)
@@ -1,37 +1,71 @@
+import asyncio
+import copy
 import fnmatch
 import logging
 
+from collections.abc import Awaitable, Callable, Hashable
 from typing import Any
 
 from dbus_fast.constants import ErrorType
 from dbus_fast.errors import DBusError
 
 from dbus2mqtt.dbus.dbus_client import DbusClient
+from dbus2mqtt.flow import current_flow_execution_context
 
 logger = logging.getLogger(__name__)
 
+_NOT_MIRRORED = object()
+
 class DbusContext:
 
     def __init__(self, dbus_client: DbusClient):
         self.dbus_client = dbus_client
 
-    def async_dbus_list_fn(self, bus_name_pattern: str):
+    async def _memoize(self, key: Hashable, memoize: bool, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Identical calls within a single flow execution only hit D-Bus once"""
+
+        flow_execution_context = current_flow_execution_context.get()
+        if not memoize or flow_execution_context is None:
+            return await fn()
+
+        # each caller gets its own copy, templates modifying a result don't affect later calls
+        return copy.deepcopy(await flow_execution_context.memoize(key, fn))
+
+    def async_dbus_list_fn(self, bus_name_pattern: str, memoize: bool = True):
+
+        flow_execution_context = current_flow_execution_context.get()
+        key = ("dbus_list", bus_name_pattern)
+        if memoize and flow_execution_context is not None:
+            future = flow_execution_context.memo.get(key)
+            if future is not None and future.done():
+                return list(future.result())
 
         res = []
 
-        self.dbus_client.subscriptions
         for bus_name in self.dbus_client.subscriptions.keys():
             if fnmatch.fnmatchcase(bus_name, bus_name_pattern):
                 res.append(bus_name)
 
+        if memoize and flow_execution_context is not None:
+            # stored as a completed future, like all other memoized results
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(res)
+            flow_execution_context.memo[key] = future
+            return list(res)
+
         return res
 
-    async def async_dbus_call_fn(self, bus_name: str, path: str, interface: str, method:str, method_args: list[Any] = []):
+    async def async_dbus_call_fn(self, bus_name: str, path: str, interface: str, method:str, method_args: list[Any] = [], memoize: bool = True):
 
         if not isinstance(method_args, list):
             # Pylance will mention this line is unreachable. It is not, jinja2 can pass in any type
             raise ValueError("method_args must be a list")
 
+        key = ("dbus_call", bus_name, path, interface, method, repr(method_args))
+        return await self._memoize(key, memoize, lambda: self._dbus_call(bus_name, path, interface, method, method_args))
+
+    async def _dbus_call(self, bus_name: str, path: str, interface: str, method:str, method_args: list[Any]):
+
         proxy_object = self.dbus_client.get_subscribed_proxy_object(bus_name, path)
         if not proxy_object:
             raise ValueError(f"No matching subscription found for bus_name: {bus_name}, path: {path}")
@@ -40,12 +74,22 @@ class DbusContext:
 
         return await self.dbus_client.call_dbus_interface_method(obj_interface, method, method_args)
 
-    async def async_dbus_property_get_fn(self, bus_name: str, path: str, interface: str, property:str, default_unsupported: Any = None):
+    async def async_dbus_property_get_fn(self, bus_name: str, path: str, interface: str, property:str, default_unsupported: Any = None, memoize: bool = True):
+
+        key = ("dbus_property_get", bus_name, path, interface, property, repr(default_unsupported))
+        return await self._memoize(key, memoize, lambda: self._dbus_property_get(bus_name, path, interface, property, default_unsupported))
+
+    async def _dbus_property_get(self, bus_name: str, path: str, interface: str, property:str, default_unsupported: Any):
 
         proxy_object = self.dbus_client.get_subscribed_proxy_object(bus_name, path)
         if not proxy_object:
             raise ValueError(f"No matching subscription found for bus_name: {bus_name}, path: {path}")
 
+        # mirrored properties are kept up to date from PropertiesChanged signals
+        value = self.dbus_client.property_mirror.get(bus_name, path, interface, property, default=_NOT_MIRRORED)
+        if value is not _NOT_MIRRORED:
+            return value
+
         obj_interface = proxy_object.get_interface(interface)
 
         try:
@@ -54,6 +98,23 @@ class DbusContext:
             if e.type == ErrorType.NOT_SUPPORTED.value and default_unsupported is not None:
                 return default_unsupported
 
+    async def async_dbus_properties_fn(self, bus_name: str, path: str, interface: str, memoize: bool = True):
+
+        key = ("dbus_properties", bus_name, path, interface)
+        return await self._memoize(key, memoize, lambda: self._dbus_properties(bus_name, path, interface))
+
+    async def _dbus_properties(self, bus_name: str, path: str, interface: str) -> dict[str, Any]:
+
+        proxy_object = self.dbus_client.get_subscribed_proxy_object(bus_name, path)
+        if not proxy_object:
+            raise ValueError(f"No matching subscription found for bus_name: {bus_name}, path: {path}")
+
+        properties = self.dbus_client.property_mirror.get_all(bus_name, path, interface)
+        if properties is not None:
+            return properties
+
+        return await self.dbus_client.get_dbus_interface_properties(bus_name, path, interface)
+
 def jinja_custom_dbus_functions(dbus_client: DbusClient) -> dict[str, Any]:
 
     dbus_context = DbusContext(dbus_client)
@@ -62,7 +123,8 @@ def jinja_custom_dbus_functions(dbus_client: DbusClient) -> dict[str, Any]:
     custom_functions.update({
         "dbus_list": dbus_context.async_dbus_list_fn,
         "dbus_call": dbus_context.async_dbus_call_fn,
-        "dbus_property_get": dbus_context.async_dbus_property_get_fn
+        "dbus_property_get": dbus_context.async_dbus_property_get_fn,
+        "dbus_properties": dbus_context.async_dbus_properties_fn
     })
 
     return custom_functions
@@ -1,9 +1,16 @@
+import asyncio
+import copy
+import inspect
+import threading
+import time
 import urllib.parse
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, TypeVar
 
-from jinja2 import BaseLoader, StrictUndefined, TemplateError
+from jinja2 import BaseLoader, StrictUndefined, Template, TemplateError, nodes
 from jinja2.nativetypes import NativeEnvironment
 from jinja2_ansible_filters import AnsibleCoreFiltersExtension
 
@@ -12,8 +19,45 @@ TemplateResultType = TypeVar('TemplateResultType')
 def urldecode(string):
     return urllib.parse.unquote(string)
 
+@dataclass
+class TemplateCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    compile_time: float = 0.0
+    """Total time spent compiling templates, in seconds"""
+
+class CompiledTemplate:
+    """Handle to a template string.
+    Strings without any Jinja syntax are static, they are rendered once and returned as a constant.
+    Other templates are compiled once for each environment they are rendered with.
+    """
+
+    def __init__(self, source: str, static: bool = False, static_value: Any = None):
+        self.source = source
+        self.static = static
+        self.static_value = static_value
+        self.template: Template | None = None
+        self.async_template: Template | None = None
+        self.referenced_names: frozenset[str] | None = None
+        """Names loaded by the template, e.g. context variables and global functions"""
+        self.calls_async_functions = False
+        """True when the template references async functions registered as global"""
+        self.calls_async_functions_version = -1
+
+    def constant(self) -> Any:
+        # Copy mutable values to keep the constant intact, e.g. '[1, 2, 3]' renders into a list
+        if isinstance(self.static_value, (list, dict, set)):
+            return copy.deepcopy(self.static_value)
+        return self.static_value
+
+    def __repr__(self) -> str:
+        return repr(self.source)
+
+Templatable = str | dict[str, Any] | CompiledTemplate
+
 class TemplateEngine:
-    def __init__(self):
+    def __init__(self, cache_size: int = 512, dict_render_concurrency: int = 1):
 
         engine_globals = {}
         engine_globals['now'] = datetime.now
@@ -38,19 +82,165 @@ class TemplateEngine:
 
         self.app_context: dict[str, Any] = {}
 
+        # Compiled templates keyed by template source in LRU order, each handle holds the template per environment
+        self.cache_size = cache_size
+        self.cache_stats = TemplateCacheStats()
+        self._template_cache: OrderedDict[str, CompiledTemplate] = OrderedDict()
+        # Templates are also rendered from paho's network thread, e.g. mqtt_message trigger filters
+        self._cache_lock = threading.Lock()
+
+        # Default for async_render_template, max number of dict keys calling async functions rendered concurrently
+        self.dict_render_concurrency = dict_render_concurrency
+
         self.jinja2_env.globals.update(engine_globals)
         self.jinja2_async_env.globals.update(engine_globals)
 
         self.jinja2_env.filters.update(engine_filters)
         self.jinja2_async_env.filters.update(engine_filters)
 
+        # Names of global functions that can only be rendered by the async environment
+        self._async_functions: set[str] = set()
+        self._async_functions_version = 0
+
     def add_functions(self, custom_functions: dict[str, Any]):
         self.jinja2_env.globals.update(custom_functions)
         self.jinja2_async_env.globals.update(custom_functions)
 
+        for name, fn in custom_functions.items():
+            if inspect.iscoroutinefunction(fn):
+                self._async_functions.add(name)
+            else:
+                self._async_functions.discard(name)
+
+        # Previously analysed templates must be re-evaluated against the new functions
+        self._async_functions_version += 1
+
     def update_app_context(self, context: dict[str, Any]):
         self.app_context.update(context)
 
+    def _is_static(self, source: str) -> bool:
+        env = self.jinja2_env
+        return (
+            env.variable_start_string not in source
+            and env.block_start_string not in source
+            and env.comment_start_string not in source
+        )
+
+    def _add_compile_time(self, seconds: float):
+        with self._cache_lock:
+            self.cache_stats.compile_time += seconds
+
+    def _new_compiled_template(self, source: str) -> CompiledTemplate:
+
+        if not self._is_static(source):
+            return CompiledTemplate(source)
+
+        # Render once, NativeEnvironment still converts literals like '3' or '[1, 2]' into python types
+        start = time.perf_counter()
+        static_value = self.jinja2_env.from_string(source).render()
+        self._add_compile_time(time.perf_counter() - start)
+
+        return CompiledTemplate(source, static=True, static_value=static_value)
+
+    def _get_template(self, compiled: CompiledTemplate, use_async: bool) -> Template:
+        """Returns the jinja template for the sync or async environment, compiling it on first use"""
+
+        template = compiled.async_template if use_async else compiled.template
+        if template is None:
+            env = self.jinja2_async_env if use_async else self.jinja2_env
+
+            start = time.perf_counter()
+            template = env.from_string(compiled.source)
+            self._add_compile_time(time.perf_counter() - start)
+
+            if use_async:
+                compiled.async_template = template
+            else:
+                compiled.template = template
+
+        return template
+
+    def _get_referenced_names(self, compiled: CompiledTemplate) -> frozenset[str]:
+
+        if compiled.referenced_names is None:
+            start = time.perf_counter()
+            ast = self.jinja2_env.parse(compiled.source)
+            compiled.referenced_names = frozenset(n.name for n in ast.find_all(nodes.Name) if n.ctx == "load")
+            self._add_compile_time(time.perf_counter() - start)
+
+        return compiled.referenced_names
+
+    def _requires_async(self, compiled: CompiledTemplate, context: dict[str, Any]) -> bool:
+        """True when the template references async functions, either registered via add_functions or passed in as context"""
+
+        referenced_names = self._get_referenced_names(compiled)
+
+        if compiled.calls_async_functions_version != self._async_functions_version:
+            compiled.calls_async_functions = not self._async_functions.isdisjoint(referenced_names)
+            compiled.calls_async_functions_version = self._async_functions_version
+        if compiled.calls_async_functions:
+            return True
+
+        for name in referenced_names:
+            value = context.get(name)
+            if callable(value) and inspect.iscoroutinefunction(value):
+                return True
+        return False
+
+    def _get_compiled_template(self, source: str) -> CompiledTemplate:
+        """Returns the cached handle for source, creating and caching it when not seen before"""
+
+        with self._cache_lock:
+            compiled = self._template_cache.get(source)
+            if compiled is not None:
+                self._template_cache.move_to_end(source)
+                self.cache_stats.hits += 1
+                return compiled
+
+            self.cache_stats.misses += 1
+
+        # static templates are rendered here, outside of the lock
+        compiled = self._new_compiled_template(source)
+
+        if self.cache_size > 0:
+            with self._cache_lock:
+                # another thread may have cached the same source in the meantime
+                cached = self._template_cache.get(source)
+                if cached is not None:
+                    return cached
+
+                self._template_cache[source] = compiled
+                while len(self._template_cache) > self.cache_size:
+                    self._template_cache.popitem(last=False)
+                    self.cache_stats.evictions += 1
+
+        return compiled
+
+    def compile_template(self, templatable: str | dict[str, Any]) -> Any:
+        """Compiles a template string, or all template strings in a nested dict, for both the sync and async environment.
+        Returns a CompiledTemplate or a dict of CompiledTemplates which can be passed to render_template and async_render_template.
+        Raises a TemplateError on syntax errors
+        """
+
+        if isinstance(templatable, str):
+            try:
+                compiled = self._new_compiled_template(templatable)
+                if not compiled.static:
+                    self._get_referenced_names(compiled)
+                    self._get_template(compiled, use_async=False)
+                    self._get_template(compiled, use_async=True)
+            except TemplateError as e:
+                raise TemplateError(f"Error compiling template, template={templatable}: {e}") from e
+            return compiled
+
+        elif isinstance(templatable, dict):
+            return {
+                k: self.compile_template(v) if isinstance(v, dict) or isinstance(v, str) else v
+                for k, v in templatable.items()
+            }
+
+        return templatable
+
     def _convert_value(self, res: Any, res_type: type[TemplateResultType]) -> TemplateResultType:
 
         if res is None:
@@ -65,24 +255,29 @@ class TemplateEngine:
         except Exception as e:
             raise ValueError(f"Error converting rendered template result from '{type(res).__name__}' to '{res_type.__name__}'") from e
 
-    def _render_template_nested(self, templatable: str | dict[str, Any], context: dict[str, Any] = {}) -> Any:
+    def _render_template_nested(self, templatable: Templatable, context: dict[str, Any] = {}) -> Any:
 
         if isinstance(templatable, str):
+            templatable = self._get_compiled_template(templatable)
+
+        if isinstance(templatable, CompiledTemplate):
+            if templatable.static:
+                return templatable.constant()
             try:
-                return self.jinja2_env.from_string(templatable).render(**context)
+                return self._get_template(templatable, use_async=False).render(**context)
             except TemplateError as e:
-                raise TemplateError(f"Error compiling template, template={templatable}: {e}") from e
+                raise TemplateError(f"Error compiling template, template={templatable.source}: {e}") from e
 
         elif isinstance(templatable, dict):
             res = {}
             for k, v in templatable.items():
-                if isinstance(v, dict) or isinstance(v, str):
+                if isinstance(v, dict) or isinstance(v, str) or isinstance(v, CompiledTemplate):
                     res[k] = self._render_template_nested(v, context)
                 else:
                     res[k] = v
             return res
 
-    def render_template(self, templatable: str | dict[str, Any], res_type: type[TemplateResultType], context: dict[str, Any] = {}) -> TemplateResultType:
+    def render_template(self, templatable: Templatable, res_type: type[TemplateResultType], context: dict[str, Any] = {}) -> TemplateResultType:
 
         if isinstance(templatable, dict) and res_type is not dict:
             raise ValueError(f"res_type should dict for dictionary templates, templatable={templatable}")
@@ -91,28 +286,70 @@ class TemplateEngine:
         res = self._convert_value(res, res_type)
         return res
 
-    async def _async_render_template_nested(self, templatable: str | dict[str, Any], context: dict[str, Any] = {}) -> Any:
+    async def _async_render_template_nested(self, templatable: Templatable, context: dict[str, Any] = {}, semaphore: asyncio.Semaphore | None = None) -> Any:
+        """Renders templatable, when a semaphore is given the keys of dict templates are rendered concurrently.
+        The semaphore bounds the number of async renders in flight, it is never held while waiting for nested keys.
+        """
 
         if isinstance(templatable, str):
+            templatable = self._get_compiled_template(templatable)
+
+        if isinstance(templatable, CompiledTemplate):
+            if templatable.static:
+                return templatable.constant()
             try:
-                return await self.jinja2_async_env.from_string(templatable).render_async(**context)
+                # Only templates calling async functions pay for async rendering
+                if self._requires_async(templatable, context):
+                    if semaphore is not None:
+                        async with semaphore:
+                            return await self._get_template(templatable, use_async=True).render_async(**context)
+                    return await self._get_template(templatable, use_async=True).render_async(**context)
+                return self._get_template(templatable, use_async=False).render(**context)
             except TemplateError as e:
-                raise TemplateError(f"Error compiling template, template={templatable}: {e}") from e
+                raise TemplateError(f"Error compiling template, template={templatable.source}: {e}") from e
 
         elif isinstance(templatable, dict):
             res = {}
+            pending_keys = []
+            pending_renders = []
             for k, v in templatable.items():
-                if isinstance(v, dict) or isinstance(v, str):
-                    res[k] = await self._async_render_template_nested(v, context)
+                if isinstance(v, dict) or isinstance(v, str) or isinstance(v, CompiledTemplate):
+                    if semaphore is None:
+                        res[k] = await self._async_render_template_nested(v, context)
+                    else:
+                        # reserve the key to keep the configured key order
+                        res[k] = None
+                        pending_keys.append(k)
+                        pending_renders.append(self._async_render_template_nested(v, context, semaphore))
                 else:
                     res[k] = v
+
+            if pending_renders:
+                tasks = [asyncio.ensure_future(r) for r in pending_renders]
+                try:
+                    values = await asyncio.gather(*tasks)
+                except BaseException:
+                    # one key failed, stop the other renders instead of leaving them calling D-Bus in the background
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+
+                for k, value in zip(pending_keys, values):
+                    res[k] = value
             return res
 
-    async def async_render_template(self, templatable: str | dict[str, Any], res_type: type[TemplateResultType], context: dict[str, Any] = {}) -> TemplateResultType:
+    async def async_render_template(self, templatable: Templatable, res_type: type[TemplateResultType], context: dict[str, Any] = {}, concurrency: int | None = None) -> TemplateResultType:
+        """Renders templatable using the async environment when needed.
+        concurrency overrides dict_render_concurrency, values above 1 render the keys of dict templates concurrently
+        """
 
         if isinstance(templatable, dict) and res_type is not dict:
             raise ValueError(f"res_type should be dict for dictionary templates, templatable={templatable}")
 
-        res = await self._async_render_template_nested(templatable, context)
+        concurrency = concurrency or self.dict_render_concurrency
+        semaphore = asyncio.Semaphore(concurrency) if concurrency > 1 and isinstance(templatable, dict) else None
+
+        res = await self._async_render_template_nested(templatable, context, semaphore)
         res = self._convert_value(res, res_type)
         return res
@@ -43,7 +43,7 @@ def mocked_app_context():
         flows=[]
     )
 
-    event_broker = EventBroker()
+    event_broker = EventBroker(test_config.flow_processor, test_config.mqtt.publish_digest_cache_size)
     template_engine = TemplateEngine()
     app_context = AppContext(test_config, event_broker, template_engine)
 
@@ -54,6 +54,7 @@ def mocked_flow_processor(app_context: AppContext, trigger_config: FlowTriggerCo
     flow_config = FlowConfig(triggers=[trigger_config], actions=actions)
 
     app_context.config.dbus.subscriptions[0].flows = [flow_config]
+    app_context.config.dbus.subscriptions_changed()
 
     processor = FlowProcessor(app_context)
     return processor, flow_config
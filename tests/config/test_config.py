@@ -4,9 +4,13 @@ import os
 from typing import cast
 
 import dotenv
+import pytest
 
-from dbus2mqtt.config import Config
+from jinja2 import TemplateError
+
+from dbus2mqtt.config import Config, compile_config_templates
 from dbus2mqtt.config.jsonarparse import new_argument_parser
+from dbus2mqtt.template.templating import CompiledTemplate, TemplateEngine
 
 FILE_DIR = os.path.dirname(__file__)
 
@@ -73,3 +77,35 @@ def test_jsonargparse_jinja_expressions():
     action = config.flows[2].actions[0]
     assert action.type == "log"
     assert action.msg == """jinja value {{ "testvalue" }} in the middle of a string"""
+
+def test_compile_templates():
+
+    dotenv.load_dotenv(".env.example")
+
+    parser = new_argument_parser()
+    parser.add_class_arguments(Config)
+
+    cfg = parser.parse_path(f"{FILE_DIR}/../../docs/examples/home_assistant_media_player.yaml")
+    config: Config = cast(Config, parser.instantiate_classes(cfg))
+
+    compile_config_templates(config, TemplateEngine())
+
+    interface = config.dbus.subscriptions[0].interfaces[1]
+    assert isinstance(interface._mqtt_command_topic_template, CompiledTemplate)
+
+    action = config.dbus.subscriptions[0].flows[0].actions[0]
+    assert action.type == "context_set"
+    assert action._context_template is not None
+
+def test_compile_templates_syntax_error():
+
+    dotenv.load_dotenv(".env.example")
+
+    parser = new_argument_parser()
+    parser.add_class_arguments(Config)
+
+    cfg = parser.parse_path(f"{FILE_DIR}/fixtures/invalid_template.yaml")
+    config: Config = cast(Config, parser.instantiate_classes(cfg))
+
+    with pytest.raises(TemplateError):
+        compile_config_templates(config, TemplateEngine())
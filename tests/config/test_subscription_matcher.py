@@ -0,0 +1,76 @@
+import fnmatch
+
+from dbus2mqtt.config import DbusConfig, SubscriptionConfig
+
+
+def _brute_force_subscription_configs(subscriptions: list[SubscriptionConfig], bus_name: str, path: str | None) -> list[SubscriptionConfig]:
+    res = []
+    for subscription in subscriptions:
+        if fnmatch.fnmatchcase(bus_name, subscription.bus_name):
+            if not path or path == subscription.path or fnmatch.fnmatchcase(path, subscription.path):
+                res.append(subscription)
+    return res
+
+def test_subscription_matcher_matches_fnmatch():
+
+    subscriptions = [
+        SubscriptionConfig(bus_name="org.mpris.MediaPlayer2.*", path="/org/mpris/MediaPlayer2"),
+        SubscriptionConfig(bus_name="org.bluez", path="/org/bluez/*"),
+        SubscriptionConfig(bus_name="org.freedesktop.*1", path="/org/freedesktop/*"),
+        SubscriptionConfig(bus_name="org.mpris.MediaPlayer2.vlc", path="/org/mpris/MediaPlayer2"),
+        SubscriptionConfig(bus_name="org.gnome.Session?anager", path="/"),
+        SubscriptionConfig(bus_name="*", path="/"),
+    ]
+    dbus_config = DbusConfig(subscriptions=subscriptions)
+
+    bus_names = [
+        "org.mpris.MediaPlayer2.vlc", "org.mpris.MediaPlayer2.firefox", "org.mpris.MediaPlayer2",
+        "org.bluez", "org.bluez.obex", "org.freedesktop.systemd1", "org.freedesktop.DBus",
+        "org.gnome.SessionManager", ":1.42"
+    ]
+    paths = [None, "/", "/org/mpris/MediaPlayer2", "/org/bluez/hci0", "/org/freedesktop/systemd1"]
+
+    for bus_name in bus_names:
+        assert dbus_config.is_bus_name_configured(bus_name)
+        for path in paths:
+            expected = _brute_force_subscription_configs(subscriptions, bus_name, path)
+            assert dbus_config.get_subscription_configs(bus_name, path) == expected
+            # memoized result
+            assert dbus_config.get_subscription_configs(bus_name, path) == expected
+
+def test_subscription_matcher_rebuilt_on_config_change():
+
+    dbus_config = DbusConfig(subscriptions=[
+        SubscriptionConfig(bus_name="org.mpris.MediaPlayer2.*", path="/org/mpris/MediaPlayer2"),
+    ])
+
+    assert dbus_config.is_bus_name_configured("org.mpris.MediaPlayer2.vlc")
+    assert not dbus_config.is_bus_name_configured("org.bluez")
+
+    dbus_config.subscriptions.append(SubscriptionConfig(bus_name="org.bluez", path="/org/bluez/*"))
+    dbus_config.subscriptions_changed()
+    assert dbus_config.is_bus_name_configured("org.bluez")
+
+    # replacing the subscriptions rebuilds the matcher without an explicit call
+    version = dbus_config.version
+    dbus_config.subscriptions = [SubscriptionConfig(bus_name="org.bluez", path="/org/bluez/*")]
+    assert dbus_config.version == version + 1
+    assert not dbus_config.is_bus_name_configured("org.mpris.MediaPlayer2.vlc")
+
+def test_subscription_matcher_rebuilt_on_in_place_change():
+
+    dbus_config = DbusConfig(subscriptions=[
+        SubscriptionConfig(bus_name="org.mpris.MediaPlayer2.*", path="/org/mpris/MediaPlayer2"),
+    ])
+
+    assert dbus_config.is_bus_name_configured("org.mpris.MediaPlayer2.vlc")
+
+    replacement = SubscriptionConfig(bus_name="org.bluez", path="/org/bluez/*")
+    dbus_config.subscriptions[0] = replacement
+    dbus_config.subscriptions_changed()
+    assert not dbus_config.is_bus_name_configured("org.mpris.MediaPlayer2.vlc")
+    assert dbus_config.get_subscription_configs("org.bluez", "/org/bluez/hci0") == [replacement]
+
+    replacement.path = "/org/bluez"
+    dbus_config.subscriptions_changed()
+    assert dbus_config.get_subscription_configs("org.bluez", "/org/bluez/hci0") == []
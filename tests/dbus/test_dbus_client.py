@@ -1,10 +1,14 @@
+import asyncio
+
+from unittest.mock import MagicMock
 
 import dbus_fast.introspection as dbus_intr
 import dbus_fast.signature as dbus_signature
 import pytest
 
-from dbus_fast.constants import ArgDirection
+from dbus_fast.constants import ArgDirection, MessageType
 
+from dbus2mqtt.dbus.dbus_types import BusNameSubscriptions
 from tests import mocked_app_context, mocked_dbus_client
 
 
@@ -46,8 +50,157 @@ async def test_signal_handler_unwrap_args():
     handler(*args)
 
     # Check if message is published on the internal queue
-    mqtt_message = dbus_client._dbus_signal_queue.sync_q.get_nowait()
+    mqtt_message = dbus_client._dbus_signal_queue.get_nowait()
 
     # message args should be unwrapped
     assert mqtt_message is not None
     assert mqtt_message.args == ["org.mpris.MediaPlayer2.Player", {"CanPause": True}, []]
+
+@pytest.mark.asyncio
+async def test_startup_subscriptions_concurrent_with_timeout():
+
+    app_context = mocked_app_context()
+    app_context.config.dbus.startup_concurrency = 2
+    app_context.config.dbus.startup_timeout = 0.1
+    dbus_client = mocked_dbus_client(app_context)
+
+    active = 0
+    max_active = 0
+
+    async def _handle_bus_name_added(bus_name: str):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        try:
+            await asyncio.sleep(10 if bus_name == "test.bus_name.hung" else 0.01)
+        finally:
+            active -= 1
+        return [bus_name]
+
+    dbus_client._handle_bus_name_added = _handle_bus_name_added
+
+    bus_names = ["test.bus_name.1", "test.bus_name.hung", "test.bus_name.2", "test.bus_name.3", "test.bus_name.4"]
+    res = await dbus_client._handle_bus_names_added_on_startup(bus_names)
+
+    assert res == ["test.bus_name.1", "test.bus_name.2", "test.bus_name.3", "test.bus_name.4"]
+    assert max_active == 2
+
+@pytest.mark.asyncio
+async def test_startup_timeout_leaves_no_partial_subscription():
+
+    app_context = mocked_app_context()
+    app_context.config.dbus.startup_timeout = 0.05
+    dbus_client = mocked_dbus_client(app_context)
+
+    async def _handle_bus_name_added(bus_name: str):
+        # the first object is subscribed, introspecting the next object hangs
+        proxy_object = MagicMock(_interfaces={})
+        dbus_client.subscriptions[bus_name] = BusNameSubscriptions(bus_name, ":1.1")
+        dbus_client.subscriptions[bus_name].path_objects["/"] = proxy_object
+        await asyncio.sleep(10)
+        return []
+
+    dbus_client._handle_bus_name_added = _handle_bus_name_added
+
+    res = await dbus_client._handle_bus_names_added_on_startup(["test.bus_name.hung"])
+
+    assert res == []
+    assert dbus_client.get_bus_name_subscriptions("test.bus_name.hung") is None
+
+@pytest.mark.asyncio
+async def test_list_bus_name_paths_pruned():
+
+    app_context = mocked_app_context()
+    dbus_client = mocked_dbus_client(app_context)
+
+    tree = {
+        "/": [],
+        "/org": [],
+        "/org/bluez": [],
+        "/org/bluez/hci0": ["org.bluez.Adapter1"],
+        "/org/bluez/hci0/dev_1": ["org.bluez.Device1"],
+        "/org/bluez/hci0/dev_2": ["org.bluez.Device1"],
+        "/org/freedesktop": [],
+        "/org/freedesktop/other": ["org.freedesktop.Other"],
+    }
+    introspected_paths = []
+
+    async def _introspect(bus_name: str, path: str):
+        introspected_paths.append(path)
+        prefix = path if path.endswith("/") else f"{path}/"
+        node = dbus_intr.Node(name=path, interfaces=[dbus_intr.Interface(i) for i in tree[path]])
+        node.nodes = [
+            dbus_intr.Node(name=p[len(prefix):]) for p in tree
+            if p != path and p.startswith(prefix) and "/" not in p[len(prefix):]
+        ]
+        return node
+
+    dbus_client._introspect = _introspect
+
+    paths = await dbus_client._list_bus_name_paths("org.bluez", "/", ["/org/bluez/*"])
+
+    assert paths == ["/org/bluez/hci0", "/org/bluez/hci0/dev_1", "/org/bluez/hci0/dev_2"]
+    assert "/org/freedesktop" not in introspected_paths
+    assert "/org/freedesktop/other" not in introspected_paths
+
+    # without patterns the whole tree is walked
+    paths = await dbus_client._list_bus_name_paths("org.bluez", "/")
+    assert "/org/freedesktop/other" in paths
+
+@pytest.mark.asyncio
+async def test_list_managed_object_paths():
+
+    app_context = mocked_app_context()
+    dbus_client = mocked_dbus_client(app_context)
+
+    called_paths = []
+
+    async def _call(msg):
+        called_paths.append(msg.path)
+        if msg.path == "/org/freedesktop":
+            return MagicMock(message_type=MessageType.METHOD_RETURN, body=[{
+                "/org/freedesktop/NetworkManager/Devices/1": {"org.freedesktop.NetworkManager.Device": {}},
+                "/org/freedesktop/NetworkManager/Devices/2": {"org.freedesktop.NetworkManager.Device": {}},
+            }])
+        return MagicMock(message_type=MessageType.ERROR, body=["Unknown method"])
+
+    dbus_client.bus = MagicMock()
+    dbus_client.bus.call = _call
+
+    paths = await dbus_client._list_managed_object_paths("org.freedesktop.NetworkManager", ["/org/freedesktop/NetworkManager/Devices/*"])
+
+    assert called_paths == ["/", "/org", "/org/freedesktop"]
+    assert paths == ["/org/freedesktop", "/org/freedesktop/NetworkManager/Devices/1", "/org/freedesktop/NetworkManager/Devices/2"]
+
+    # no ObjectManager, fall back to introspection
+    paths = await dbus_client._list_managed_object_paths("org.bluez", ["/org/bluez/*"])
+    assert paths is None
+
+@pytest.mark.asyncio
+async def test_name_owner_tracking():
+
+    app_context = mocked_app_context()
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.bus = MagicMock()
+
+    async def _handle_bus_name(bus_name: str):
+        return []
+
+    dbus_client._handle_bus_name_added = _handle_bus_name
+    dbus_client._handle_bus_name_removed = _handle_bus_name
+
+    def _name_owner_changed(name: str, old_owner: str, new_owner: str):
+        return MagicMock(member="NameOwnerChanged", interface="org.freedesktop.DBus", body=[name, old_owner, new_owner])
+
+    await dbus_client._handle_dbus_object_lifecycle_signal(_name_owner_changed("test.bus_name.1", "", ":1.10"))
+    await dbus_client._handle_dbus_object_lifecycle_signal(_name_owner_changed("other.bus_name", "", ":1.10"))
+
+    assert await dbus_client.get_unique_name("test.bus_name.1") == ":1.10"
+    assert dbus_client.get_well_known_bus_name(":1.10") == "test.bus_name.1"
+    dbus_client.bus.call.assert_not_called()
+
+    await dbus_client._handle_dbus_object_lifecycle_signal(_name_owner_changed("test.bus_name.1", ":1.10", ""))
+
+    assert dbus_client.name_owners.get_owner("test.bus_name.1") is None
+    assert dbus_client.get_well_known_bus_name(":1.10") == ":1.10"
+    assert dbus_client.name_owners.get_names(":1.10") == ["other.bus_name"]
@@ -6,7 +6,6 @@ import dbus2mqtt.config as config
 
 from dbus2mqtt import AppContext
 from dbus2mqtt.dbus.dbus_client import DbusClient
-from dbus2mqtt.dbus.dbus_types import BusNameSubscriptions
 from dbus2mqtt.event_broker import MqttMessage, MqttReceiveHints
 from tests import mocked_app_context, mocked_dbus_client
 
@@ -145,6 +144,76 @@ async def test_method_invalid_path():
 
     assert mocked_proxy_interface.call_test_method2.call_count == 0
 
+@pytest.mark.asyncio
+async def test_method_after_object_removed():
+    """ Mock contains 3 bus objects, one of the matching objects is removed.
+        Expect the method to be called 1 time, for the remaining bus object
+    """
+    app_context = _mocked_app_context()
+    dbus_client, mocked_proxy_interface = _mocked_dbus_client(app_context)
+
+    await dbus_client._handle_interfaces_removed("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2")
+    assert "org.mpris.MediaPlayer2.vlc" not in dbus_client.subscriptions
+
+    await dbus_client._on_mqtt_msg(
+        MqttMessage(
+            topic="dbus2mqtt/test/command",
+            payload={
+                "method": "TestMethod2",
+            }
+        ),
+        MqttReceiveHints()
+    )
+
+    assert mocked_proxy_interface.call_test_method2.call_count == 1
+
+@pytest.mark.asyncio
+async def test_method_of_interface_with_other_command_topic():
+    """ Commands on any configured mqtt_command_topic reach matching methods of all configured
+        interfaces, also interfaces configured with another or without mqtt_command_topic
+    """
+    app_context = _mocked_app_context()
+    app_context.config.dbus.subscriptions[0].interfaces.extend([
+        config.InterfaceConfig(
+            interface="other-interface-name",
+            mqtt_command_topic="dbus2mqtt/other/command",
+            methods=[config.MethodConfig(method="TestMethod3")]
+        ),
+        config.InterfaceConfig(
+            interface="no-topic-interface-name",
+            methods=[config.MethodConfig(method="TestMethod4")]
+        )
+    ])
+    app_context.config.dbus.subscriptions_changed()
+
+    dbus_client, mocked_proxy_interface = _mocked_dbus_client(app_context)
+    mocked_proxy_interface.call_test_method3 = AsyncMock()
+    mocked_proxy_interface.call_test_method4 = AsyncMock()
+
+    for method in ["TestMethod3", "TestMethod4"]:
+        await dbus_client._on_mqtt_msg(
+            MqttMessage(topic="dbus2mqtt/test/command", payload={"method": method}),
+            MqttReceiveHints()
+        )
+
+    assert mocked_proxy_interface.call_test_method3.call_count == 2
+    assert mocked_proxy_interface.call_test_method4.call_count == 2
+
+@pytest.mark.asyncio
+async def test_command_topic_after_interface_replaced():
+
+    app_context = _mocked_app_context()
+    dbus_client, _ = _mocked_dbus_client(app_context)
+
+    assert dbus_client.command_routes.is_command_topic("dbus2mqtt/test/command")
+
+    interfaces = app_context.config.dbus.subscriptions[0].interfaces
+    interfaces[0] = config.InterfaceConfig(interface="test-interface-name", mqtt_command_topic="dbus2mqtt/other/command")
+    app_context.config.dbus.subscriptions_changed()
+
+    assert not dbus_client.command_routes.is_command_topic("dbus2mqtt/test/command")
+    assert dbus_client.command_routes.is_command_topic("dbus2mqtt/other/command")
+
 async def _publish_msg(msg: MqttMessage):
 
     app_context = _mocked_app_context()
@@ -195,12 +264,10 @@ def _mocked_dbus_client(app_context: AppContext) -> tuple[DbusClient, MagicMock]
     index = 1
     for bus_name, path in dbus_objects:
 
-        dbus_client.subscriptions[bus_name] = BusNameSubscriptions(bus_name, f":1:{index}")
-
         mocked_proxy_object = MagicMock()
         mocked_proxy_object.get_interface.return_value = mocked_proxy_interface
 
-        dbus_client.subscriptions[bus_name].path_objects[path] = mocked_proxy_object
+        dbus_client._add_subscribed_proxy_object(bus_name, f":1:{index}", path, mocked_proxy_object)
 
         index += 1
 
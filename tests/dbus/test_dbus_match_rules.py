@@ -0,0 +1,59 @@
+import dbus_fast.introspection as dbus_intr
+import pytest
+
+from dbus_fast.constants import ArgDirection
+
+from dbus2mqtt.config import SignalConfig
+from dbus2mqtt.dbus.dbus_match_rules import (
+    build_signal_match_rule,
+    parse_signal_filter_args,
+)
+from dbus2mqtt.template.templating import TemplateEngine
+from tests import mocked_app_context, mocked_dbus_client
+
+BASE_MATCH_RULE = "type='signal',sender=org.mpris.MediaPlayer2.vlc,interface=org.freedesktop.DBus.Properties,path=/org/mpris/MediaPlayer2"
+
+def test_parse_signal_filter_args():
+
+    template_engine = TemplateEngine()
+
+    assert parse_signal_filter_args(template_engine, "{{ args[0] == 'org.mpris.MediaPlayer2.Player' }}") == {0: "org.mpris.MediaPlayer2.Player"}
+    assert parse_signal_filter_args(template_engine, "{{ 'b' == args[1] and args[0] == 'a' }}") == {0: "a", 1: "b"}
+
+    assert parse_signal_filter_args(template_engine, "{{ args[0] != 'a' }}") is None
+    assert parse_signal_filter_args(template_engine, "{{ args[0] == 'a' or args[0] == 'b' }}") is None
+    assert parse_signal_filter_args(template_engine, "{{ args[0] == 'a' and args[0] == 'b' }}") is None
+    assert parse_signal_filter_args(template_engine, "{{ args[1]['Metadata'] == 'a' }}") is None
+    assert parse_signal_filter_args(template_engine, "{{ args[0] == 1 }}") is None
+    assert parse_signal_filter_args(template_engine, "{{ args[0] == 'a' }} ") is None
+
+def test_build_signal_match_rule():
+
+    assert build_signal_match_rule(BASE_MATCH_RULE, "PropertiesChanged", {0: "it's"}) == \
+        BASE_MATCH_RULE + ",member='PropertiesChanged',arg0='it'\\''s'"
+
+@pytest.mark.asyncio
+async def test_dbus_client_signal_match_rule():
+
+    dbus_client = mocked_dbus_client(mocked_app_context())
+
+    properties_changed = dbus_intr.Signal("PropertiesChanged", [
+        dbus_intr.Arg(name="interface_name", signature="s", direction=ArgDirection.IN),
+        dbus_intr.Arg(name="changed_properties", signature="a{sv}", direction=ArgDirection.IN),
+        dbus_intr.Arg(name="invalidated_properties", signature="as", direction=ArgDirection.IN)
+    ])
+    interface_signals = {"PropertiesChanged": properties_changed}
+
+    def _configured_signals(*filters):
+        return {"PropertiesChanged": [{"signal_config": SignalConfig(signal="PropertiesChanged", filter=f)} for f in filters]}
+
+    player_filter = "{{ args[0] == 'org.mpris.MediaPlayer2.Player' }}"
+
+    assert dbus_client._get_signal_match_rule(BASE_MATCH_RULE, interface_signals, _configured_signals(player_filter, player_filter)) == \
+        BASE_MATCH_RULE + ",member='PropertiesChanged',arg0='org.mpris.MediaPlayer2.Player'"
+
+    # different or unsupported filters, only filter on member
+    assert dbus_client._get_signal_match_rule(BASE_MATCH_RULE, interface_signals, _configured_signals(player_filter, None)) == \
+        BASE_MATCH_RULE + ",member='PropertiesChanged'"
+    assert dbus_client._get_signal_match_rule(BASE_MATCH_RULE, interface_signals, _configured_signals("{{ args[1] == 'x' }}")) == \
+        BASE_MATCH_RULE + ",member='PropertiesChanged'"
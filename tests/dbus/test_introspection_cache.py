@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+from unittest.mock import patch
+
+import pytest
+
+from dbus2mqtt.dbus.introspection_cache import IntrospectionCache
+
+PLAYER_XML = """<node>
+  <interface name="org.mpris.MediaPlayer2.Player">
+    <method name="Play"/>
+  </interface>
+</node>"""
+
+def test_identical_xml_is_parsed_once():
+
+    cache = IntrospectionCache(ttl=60)
+
+    node_1 = cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+    node_2 = cache.put("org.mpris.MediaPlayer2.firefox", "/org/mpris/MediaPlayer2", PLAYER_XML)
+
+    assert node_1 is node_2
+    assert [i.name for i in node_1.interfaces] == ["org.mpris.MediaPlayer2.Player"]
+    assert cache.get("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2") is node_1
+    assert cache.get("org.mpris.MediaPlayer2.vlc", "/other") is None
+
+def test_ttl_and_invalidation():
+
+    cache = IntrospectionCache(ttl=60)
+
+    with patch("time.time", return_value=1000):
+        cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+        cache.put("org.mpris.MediaPlayer2.vlc", "/other", PLAYER_XML)
+        cache.put("org.mpris.MediaPlayer2.firefox", "/org/mpris/MediaPlayer2", PLAYER_XML)
+
+    with patch("time.time", return_value=1030):
+        cache.invalidate("org.mpris.MediaPlayer2.vlc")
+        assert cache.get("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2") is None
+        assert cache.get("org.mpris.MediaPlayer2.vlc", "/other") is None
+        assert cache.get("org.mpris.MediaPlayer2.firefox", "/org/mpris/MediaPlayer2") is not None
+
+    with patch("time.time", return_value=1061):
+        assert cache.get("org.mpris.MediaPlayer2.firefox", "/org/mpris/MediaPlayer2") is None
+
+def test_disabled_cache():
+
+    cache = IntrospectionCache(ttl=0)
+
+    node = cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+    assert node is not None
+    assert cache.get("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2") is None
+
+def test_save_and_load(tmp_path):
+
+    cache_file = str(tmp_path / "introspection_cache.json")
+
+    cache = IntrospectionCache(ttl=60, cache_file=cache_file)
+    cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+    cache.put(":1.42", "/org/mpris/MediaPlayer2", PLAYER_XML)
+    cache.save()
+
+    loaded_cache = IntrospectionCache(ttl=60, cache_file=cache_file)
+    loaded_cache.load()
+
+    node = loaded_cache.get("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2")
+    assert node is not None
+    assert [i.name for i in node.interfaces] == ["org.mpris.MediaPlayer2.Player"]
+
+    # unique names are not persisted
+    assert loaded_cache.get(":1.42", "/org/mpris/MediaPlayer2") is None
+
+def test_unused_xml_is_released():
+
+    cache = IntrospectionCache(ttl=60)
+
+    with patch("time.time", return_value=1000):
+        cache.put("org.bluez", "/org/bluez/hci0", PLAYER_XML)
+        cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+
+        # introspection of the adapter changes over time, the previous xml is dropped once unused
+        for i in range(3):
+            cache.put("org.bluez", "/org/bluez/hci0", PLAYER_XML.replace("</node>", f'<node name="dev_{i}"/></node>'))
+        assert len(cache._xml) == 2 and len(cache._nodes) == 2
+
+        cache.invalidate("org.bluez")
+        assert len(cache._xml) == 1 and len(cache._nodes) == 1
+
+    # expired entries release their xml as well
+    with patch("time.time", return_value=1061):
+        assert cache.get("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2") is None
+        assert not cache._xml and not cache._nodes and not cache._refs
+
+@pytest.mark.asyncio
+async def test_schedule_save_debounces_writes(tmp_path):
+
+    cache_file = tmp_path / "introspection_cache.json"
+    cache = IntrospectionCache(ttl=60, cache_file=str(cache_file))
+
+    with patch.object(cache, "_write", wraps=cache._write) as write:
+        cache.put("org.mpris.MediaPlayer2.vlc", "/org/mpris/MediaPlayer2", PLAYER_XML)
+        cache.schedule_save(delay=0.01)
+        cache.put("org.mpris.MediaPlayer2.firefox", "/org/mpris/MediaPlayer2", PLAYER_XML)
+        cache.schedule_save(delay=0.01)
+
+        await asyncio.sleep(0.1)
+
+        assert write.call_count == 1
+        assert len(json.loads(cache_file.read_text())["entries"]) == 2
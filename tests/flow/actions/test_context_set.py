@@ -34,7 +34,7 @@ async def test_context():
         FlowTriggerMessage(flow_config, trigger_config, datetime.now())
     )
 
-    mqtt_message = app_context.event_broker.mqtt_publish_queue.sync_q.get_nowait()
+    mqtt_message = app_context.event_broker.mqtt_publish_queue.get_nowait()
 
     assert mqtt_message is not None
     assert mqtt_message.payload == "test.bus_name.*"
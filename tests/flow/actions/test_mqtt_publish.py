@@ -4,6 +4,7 @@ import pytest
 
 from dbus2mqtt.config import FlowActionMqttPublishConfig, FlowTriggerScheduleConfig
 from dbus2mqtt.flow.flow_processor import FlowTriggerMessage
+from dbus2mqtt.mqtt.publish_digest_cache import PublishDigestCache
 from tests import mocked_app_context, mocked_flow_processor
 
 
@@ -24,10 +25,52 @@ async def test_mqtt_publish_action():
         FlowTriggerMessage(flow_config, trigger_config, datetime.now())
     )
 
-    mqtt_message = app_context.event_broker.mqtt_publish_queue.sync_q.get_nowait()
+    mqtt_message = app_context.event_broker.mqtt_publish_queue.get_nowait()
 
     assert mqtt_message is not None
     assert mqtt_message.payload_serialization_type == "json"
 
     payload: dict = mqtt_message.payload
     assert payload["test-key"] == "test-value"
+
+@pytest.mark.asyncio
+async def test_mqtt_publish_action_only_on_change():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionMqttPublishConfig(
+            topic="dbus2mqtt/test",
+            payload_template={"status": "{{ status }}"},
+            only_on_change=True
+        )
+    ])
+
+    mqtt_publish_queue = app_context.event_broker.mqtt_publish_queue
+
+    for status in ["Playing", "Playing", "Paused", "Paused"]:
+        await processor._process_flow_trigger(
+            FlowTriggerMessage(flow_config, trigger_config, datetime.now(), {"status": status})
+        )
+
+    assert mqtt_publish_queue.qsize() == 2
+    assert mqtt_publish_queue.get_nowait().payload == {"status": "Playing"}
+    assert mqtt_publish_queue.get_nowait().payload == {"status": "Paused"}
+
+def test_publish_digest_cache_refresh_interval_and_size():
+
+    cache = PublishDigestCache(max_size=2)
+
+    assert cache.should_publish("a", {"x": 1, "y": 2}, "json")
+    assert not cache.should_publish("a", {"y": 2, "x": 1}, "json")
+    assert cache.should_publish("a", {"x": 1, "y": 2}, "yaml")
+
+    # unchanged payloads are published again after refresh_interval
+    assert cache.should_publish("a", {"x": 1, "y": 2}, "yaml", refresh_interval=0)
+
+    # least recently published topics are evicted
+    assert cache.should_publish("b", "text", "text")
+    assert cache.should_publish("c", "text", "text")
+    assert cache.should_publish("a", {"x": 1, "y": 2}, "yaml")
+    assert not cache.should_publish("c", "text", "text")
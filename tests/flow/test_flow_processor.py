@@ -1,4 +1,8 @@
+import asyncio
+import gc
+
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 
@@ -7,11 +11,13 @@ from dbus2mqtt.config import (
     FlowTriggerBusNameAddedConfig,
     FlowTriggerBusNameRemovedConfig,
     FlowTriggerDbusSignalConfig,
+    FlowTriggerMqttMessageConfig,
     FlowTriggerObjectAddedConfig,
     FlowTriggerObjectRemovedConfig,
     FlowTriggerScheduleConfig,
 )
-from dbus2mqtt.flow.flow_processor import FlowTriggerMessage
+from dbus2mqtt.flow import FlowExecutionContext
+from dbus2mqtt.flow.flow_processor import FlowScheduler, FlowTriggerMessage
 from tests import mocked_app_context, mocked_flow_processor
 
 
@@ -35,6 +41,24 @@ async def test_schedule_trigger():
 
     assert processor._global_context["res"] == "scheduler"
 
+@pytest.mark.asyncio
+async def test_trigger_log_contains_queued_triggers_per_lane():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerMqttMessageConfig(topic="dbus2mqtt/test")
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[])
+
+    queue = app_context.event_broker.flow_trigger_queue
+    queue.put_nowait(FlowTriggerMessage(flow_config, FlowTriggerScheduleConfig(), datetime.now()))
+
+    with patch("dbus2mqtt.flow.flow_processor.logger") as logger:
+        logger.isEnabledFor.return_value = True
+        await processor._process_flow_trigger(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+
+    log_message = logger.info.call_args.args[0]
+    assert "queued={'high': 0, 'normal': 0, 'low': 1}" in log_message
+
 @pytest.mark.asyncio
 async def test_bus_name_added_trigger():
 
@@ -148,6 +172,144 @@ async def test_dbus_signal_trigger():
         "subscription_interfaces": ["test-interface-name"]
     }
 
+@pytest.mark.asyncio
+async def test_flow_processor_workers_serialize_per_ordering_key():
+
+    app_context = mocked_app_context()
+    app_context.config.flow_processor.workers = 4
+    app_context.config.flow_processor.ordering_key = ["bus_name"]
+
+    trigger_config = FlowTriggerDbusSignalConfig(interface="test-interface-name", signal="TestSignal")
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[])
+
+    hung_player = asyncio.Event()
+    processed: list[tuple[str, int]] = []
+
+    async def process_flow_trigger(msg: FlowTriggerMessage):
+        bus_name = msg.trigger_context["bus_name"]
+        if bus_name == "org.mpris.MediaPlayer2.hung":
+            await hung_player.wait()
+        processed.append((bus_name, msg.trigger_context["value"]))
+
+    processor._process_flow_trigger = process_flow_trigger
+
+    queue = app_context.event_broker.flow_trigger_queue
+    for value in range(2):
+        for bus_name in ["org.mpris.MediaPlayer2.hung", "org.mpris.MediaPlayer2.vlc"]:
+            queue.put_nowait(FlowTriggerMessage(flow_config, trigger_config, datetime.now(), {"bus_name": bus_name, "value": value}))
+
+    task = asyncio.create_task(processor.flow_processor_task())
+    try:
+        # the hung player doesn't block triggers of other players
+        await asyncio.wait_for(_wait_until(lambda: len(processed) == 2), timeout=1)
+        assert processed == [("org.mpris.MediaPlayer2.vlc", 0), ("org.mpris.MediaPlayer2.vlc", 1)]
+
+        # triggers of the hung player are processed in order once it responds
+        hung_player.set()
+        await asyncio.wait_for(queue.join(), timeout=1)
+        assert processed[2:] == [("org.mpris.MediaPlayer2.hung", 0), ("org.mpris.MediaPlayer2.hung", 1)]
+    finally:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_flow_processor_keeps_priority_while_workers_are_busy():
+
+    app_context = mocked_app_context()
+
+    schedule_trigger = FlowTriggerScheduleConfig()
+    mqtt_trigger = FlowTriggerMqttMessageConfig(topic="dbus2mqtt/test")
+    processor, flow_config = mocked_flow_processor(app_context, schedule_trigger, actions=[])
+
+    busy = asyncio.Event()
+    processed: list[str] = []
+
+    async def process_flow_trigger(msg: FlowTriggerMessage):
+        if not processed:
+            await busy.wait()
+        processed.append(msg.flow_trigger_config.type)
+
+    processor._process_flow_trigger = process_flow_trigger
+
+    queue = app_context.event_broker.flow_trigger_queue
+    queue.put_nowait(FlowTriggerMessage(flow_config, schedule_trigger, datetime.now()))
+
+    task = asyncio.create_task(processor.flow_processor_task())
+    try:
+        await asyncio.sleep(0.01)
+
+        # a schedule tick queued before a mqtt_message while the only worker is busy
+        queue.put_nowait(FlowTriggerMessage(flow_config, schedule_trigger, datetime.now()))
+        await asyncio.sleep(0.01)
+        queue.put_nowait(FlowTriggerMessage(flow_config, mqtt_trigger, datetime.now()))
+
+        busy.set()
+        await asyncio.wait_for(queue.join(), timeout=1)
+        assert processed == ["schedule", "mqtt_message", "schedule"]
+    finally:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_flow_processor_ordering_backlog_is_bounded():
+
+    app_context = mocked_app_context()
+    app_context.config.flow_processor.workers = 4
+    app_context.config.flow_processor.ordering_backlog_size = 2
+
+    trigger_config = FlowTriggerDbusSignalConfig(interface="test-interface-name", signal="TestSignal")
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[])
+
+    busy = asyncio.Event()
+
+    async def process_flow_trigger(msg: FlowTriggerMessage):
+        await busy.wait()
+
+    processor._process_flow_trigger = process_flow_trigger
+
+    queue = app_context.event_broker.flow_trigger_queue
+    for _ in range(6):
+        queue.put_nowait(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+
+    task = asyncio.create_task(processor.flow_processor_task())
+    try:
+        await asyncio.sleep(0.05)
+
+        # one trigger is processed, two wait in the backlog, one is held by the dispatcher, the rest stays queued
+        assert queue.qsize() == 2
+
+        busy.set()
+        await asyncio.wait_for(queue.join(), timeout=1)
+    finally:
+        task.cancel()
+
+async def _wait_until(predicate):
+    while not predicate():
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_schedule_trigger_skipped_while_pending():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerScheduleConfig(interval={"seconds": 5})
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[])
+    scheduler = FlowScheduler(app_context)
+
+    queue = app_context.event_broker.flow_trigger_queue
+
+    await scheduler._schedule_flow_strigger(flow_config, trigger_config)
+    await scheduler._schedule_flow_strigger(flow_config, trigger_config)
+    await scheduler._schedule_flow_strigger(flow_config, trigger_config)
+
+    assert queue.qsize() == 1
+    assert scheduler.skipped_counts[trigger_config.id] == 2
+
+    # once processed, the next tick is queued again
+    await processor._process_flow_trigger_message(queue.get_nowait())
+    await scheduler._schedule_flow_strigger(flow_config, trigger_config)
+
+    assert queue.qsize() == 1
+    assert scheduler.skipped_counts[trigger_config.id] == 2
+
 # @pytest.mark.asyncio
 # async def test_mqtt_trigger():
 
@@ -167,3 +329,33 @@ async def test_dbus_signal_trigger():
 #     )
 
 #     assert processor._global_context["res"] == "mqtt"
+
+@pytest.mark.asyncio
+async def test_memoized_call_failing_after_callers_cancelled():
+
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+
+    try:
+        flow_execution_context = FlowExecutionContext("test", {}, {})
+        failed = asyncio.Event()
+
+        async def dbus_call():
+            await asyncio.sleep(0.01)
+            failed.set()
+            raise ValueError("dbus call failed")
+
+        caller = asyncio.create_task(flow_execution_context.memoize("key", dbus_call))
+        await asyncio.sleep(0)
+        caller.cancel()
+
+        await failed.wait()
+        await asyncio.sleep(0)
+
+        flow_execution_context.memo.clear()
+        gc.collect()
+
+        assert unhandled == []
+    finally:
+        loop.set_exception_handler(None)
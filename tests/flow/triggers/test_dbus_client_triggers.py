@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from dbus2mqtt.config import (
@@ -37,7 +39,7 @@ async def test_bus_name_added_trigger():
 
     # trigger dbus_client and capture the triggered message
     await dbus_client._trigger_bus_name_added(subscription_config, "test-bus-name", "/some/test/path")
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -73,7 +75,7 @@ async def test_bus_name_removed_trigger():
 
     # trigger dbus_client and capture the triggered message
     await dbus_client._trigger_bus_name_removed(subscription_config, "test-bus-name", "/some/test/path")
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -109,7 +111,7 @@ async def test_object_added_trigger():
 
     # trigger dbus_client and capture the triggered message
     await dbus_client._trigger_object_added(subscription_config, "test-bus-name", "/some/test/path", [])
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -145,7 +147,7 @@ async def test_object_removed_trigger():
 
     # trigger dbus_client and capture the triggered message
     await dbus_client._trigger_object_removed(subscription_config, "test-bus-name", "/some/test/path")
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -203,7 +205,7 @@ async def test_dbus_signal_trigger():
 
     # trigger dbus_client and capture the triggered message
     await dbus_client._handle_on_dbus_signal(signal)
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -217,3 +219,84 @@ async def test_dbus_signal_trigger():
         "signal": "TestSignal",
         "args": ["first-arg", "second-arg"]
     }
+
+def _properties_changed_signal(subscription_config, bus_name: str, changed: dict, invalidated: list):
+    return DbusSignalWithState(
+        bus_name=bus_name,
+        path="/",
+        interface_name=subscription_config.interfaces[0].interface,
+        subscription_config=subscription_config,
+        signal_config=SignalConfig(signal="PropertiesChanged"),
+        args=["org.mpris.MediaPlayer2.Player", changed, invalidated]
+    )
+
+@pytest.mark.asyncio
+async def test_dbus_signal_trigger_debounce_merges_args():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerDbusSignalConfig(
+        interface="org.freedesktop.DBus.Properties",
+        signal="PropertiesChanged",
+        debounce=0.05
+    )
+    mocked_flow_processor(app_context, trigger_config, actions=[])
+
+    subscription_config = app_context.config.dbus.subscriptions[0]
+    dbus_client = mocked_dbus_client(app_context)
+    flow_trigger_queue = app_context.event_broker.flow_trigger_queue
+
+    bus_name = "test.bus_name.testapp"
+    await dbus_client._handle_on_dbus_signal(_properties_changed_signal(subscription_config, bus_name, {"Metadata": {"xesam:title": "a"}}, []))
+    await dbus_client._handle_on_dbus_signal(_properties_changed_signal(subscription_config, bus_name, {"PlaybackStatus": "Playing"}, ["Position"]))
+    await dbus_client._handle_on_dbus_signal(_properties_changed_signal(subscription_config, bus_name, {"PlaybackStatus": "Paused"}, ["Rate"]))
+
+    # nothing is triggered during the burst
+    assert flow_trigger_queue.empty()
+
+    await asyncio.sleep(0.1)
+
+    assert flow_trigger_queue.qsize() == 1
+    trigger = flow_trigger_queue.get_nowait()
+    assert trigger.trigger_context["args"] == [
+        "org.mpris.MediaPlayer2.Player",
+        {"Metadata": {"xesam:title": "a"}, "PlaybackStatus": "Paused"},
+        ["Position", "Rate"]
+    ]
+
+@pytest.mark.asyncio
+async def test_dbus_signal_trigger_throttle_leading_and_trailing():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerDbusSignalConfig(
+        interface="org.freedesktop.DBus.Properties",
+        signal="PropertiesChanged",
+        throttle=0.05,
+        leading=True
+    )
+    mocked_flow_processor(app_context, trigger_config, actions=[])
+
+    subscription_config = app_context.config.dbus.subscriptions[0]
+    dbus_client = mocked_dbus_client(app_context)
+    flow_trigger_queue = app_context.event_broker.flow_trigger_queue
+
+    bus_name = "test.bus_name.testapp"
+    for rssi in [-60, -61, -62]:
+        await dbus_client._handle_on_dbus_signal(_properties_changed_signal(subscription_config, bus_name, {"RSSI": rssi}, []))
+
+    # leading edge is triggered immediately
+    assert flow_trigger_queue.qsize() == 1
+    assert flow_trigger_queue.get_nowait().trigger_context["args"][1] == {"RSSI": -60}
+
+    await asyncio.sleep(0.08)
+
+    # trailing edge carries the signals received after the leading edge
+    assert flow_trigger_queue.qsize() == 1
+    assert flow_trigger_queue.get_nowait().trigger_context["args"][1] == {"RSSI": -62}
+
+    # a removed object drops pending triggers
+    await dbus_client._handle_on_dbus_signal(_properties_changed_signal(subscription_config, bus_name, {"RSSI": -70}, []))
+    dbus_client.signal_coalescer.remove(bus_name, "/")
+    await asyncio.sleep(0.12)
+    assert flow_trigger_queue.empty()
@@ -1,8 +1,15 @@
+import asyncio
+
 import pytest
 
 from dbus2mqtt import AppContext
-from dbus2mqtt.config import FlowActionContextSetConfig, FlowTriggerMqttMessageConfig
+from dbus2mqtt.config import (
+    FlowActionContextSetConfig,
+    FlowConfig,
+    FlowTriggerMqttMessageConfig,
+)
 from dbus2mqtt.flow.flow_processor import FlowProcessor
+from dbus2mqtt.mqtt.mqtt_trigger_index import MqttTriggerIndex
 from tests import mocked_app_context, mocked_flow_processor, mocked_mqtt_client
 
 
@@ -27,7 +34,7 @@ async def test_mqtt_message_trigger():
         "payload": test_payload
     })
 
-    trigger = app_context.event_broker.flow_trigger_queue.sync_q.get_nowait()
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
 
     # execute all flow actions
     await processor._process_flow_trigger(trigger)
@@ -60,7 +67,7 @@ async def test_mqtt_message_trigger_filter_true():
         "payload": test_payload
     })
 
-    assert app_context.event_broker.flow_trigger_queue.sync_q.qsize() == 1
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 1
 
 @pytest.mark.asyncio
 async def test_mqtt_message_trigger_filter_false():
@@ -83,7 +90,120 @@ async def test_mqtt_message_trigger_filter_false():
         "payload": test_payload
     })
 
-    assert app_context.event_broker.flow_trigger_queue.sync_q.qsize() == 0
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 0
+
+@pytest.mark.asyncio
+async def test_mqtt_message_trigger_from_network_thread():
+
+    test_topic = "dbus2mqtt/test-topic"
+    trigger_config = FlowTriggerMqttMessageConfig(
+        topic=test_topic
+    )
+
+    app_context = mocked_app_context()
+    _ = _mocked_flow_processor(app_context, trigger_config)
+    mqtt_client = mocked_mqtt_client(app_context)
+
+    # paho calls on_message from its own network thread, the trigger is handed off to the event loop
+    await asyncio.to_thread(mqtt_client._trigger_flows, topic=test_topic, trigger_context={"topic": test_topic, "payload": {}})
+
+    trigger = await asyncio.wait_for(app_context.event_broker.flow_trigger_queue.get(), timeout=1)
+    assert trigger.flow_trigger_config == trigger_config
+
+@pytest.mark.asyncio
+async def test_mqtt_message_trigger_config_change():
+
+    test_topic = "dbus2mqtt/test-topic"
+    trigger_config = FlowTriggerMqttMessageConfig(
+        topic=test_topic
+    )
+
+    app_context = mocked_app_context()
+    mqtt_client = mocked_mqtt_client(app_context)
+
+    # flows are configured after the trigger index has been built
+    _ = _mocked_flow_processor(app_context, trigger_config)
+
+    mqtt_client._trigger_flows(topic="dbus2mqtt/other-topic", trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 0
+
+    mqtt_client._trigger_flows(topic=test_topic, trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 1
+
+    app_context.config.flows.append(FlowConfig(triggers=[FlowTriggerMqttMessageConfig(topic=test_topic)], actions=[]))
+    app_context.config.flows_changed()
+
+    mqtt_client._trigger_flows(topic=test_topic, trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 3
+
+@pytest.mark.asyncio
+async def test_mqtt_message_trigger_replaced_in_place():
+
+    trigger_config = FlowTriggerMqttMessageConfig(
+        topic="dbus2mqtt/test-topic"
+    )
+
+    app_context = mocked_app_context()
+    _ = _mocked_flow_processor(app_context, trigger_config)
+    mqtt_client = mocked_mqtt_client(app_context)
+
+    mqtt_client._trigger_flows(topic="dbus2mqtt/test-topic", trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 1
+
+    flows = app_context.config.dbus.subscriptions[0].flows
+    flows[0] = FlowConfig(triggers=[FlowTriggerMqttMessageConfig(topic="dbus2mqtt/other-topic")], actions=[])
+    app_context.config.dbus.subscriptions_changed()
+    mqtt_client._trigger_flows(topic="dbus2mqtt/test-topic", trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 1
+
+    flows[0].triggers[0] = FlowTriggerMqttMessageConfig(topic="dbus2mqtt/test-topic")
+    app_context.config.dbus.subscriptions_changed()
+    mqtt_client._trigger_flows(topic="dbus2mqtt/test-topic", trigger_context={})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 2
+
+@pytest.mark.asyncio
+async def test_mqtt_message_trigger_wildcards():
+
+    trigger_config = FlowTriggerMqttMessageConfig(
+        topic="dbus2mqtt/+/command/#",
+        filter="{{ topic_wildcards[0] == 'vlc' }}"
+    )
+
+    app_context = mocked_app_context()
+    processor = _mocked_flow_processor(app_context, trigger_config)
+    mqtt_client = mocked_mqtt_client(app_context)
+
+    for topic in ["dbus2mqtt/vlc/status", "dbus2mqtt/firefox/command/play", "other/vlc/command/play"]:
+        mqtt_client._trigger_flows(topic=topic, trigger_context={"topic": topic, "payload": {}})
+    assert app_context.event_broker.flow_trigger_queue.qsize() == 0
+
+    test_topic = "dbus2mqtt/vlc/command/player/play"
+    mqtt_client._trigger_flows(topic=test_topic, trigger_context={"topic": test_topic, "payload": {}})
+
+    trigger = app_context.event_broker.flow_trigger_queue.get_nowait()
+    assert trigger.trigger_context["topic_wildcards"] == ["vlc", "player/play"]
+
+    await processor._process_flow_trigger(trigger)
+    assert processor._global_context["res"]["topic"] == test_topic
+
+def test_mqtt_trigger_index_topic_matching():
+
+    filters = ["a/b", "a/+", "a/#", "+/+", "#", "+/b/#", "$SYS/#", "a/+/c"]
+    app_context = mocked_app_context()
+    app_context.config.flows = [
+        FlowConfig(triggers=[FlowTriggerMqttMessageConfig(topic=f) for f in filters], actions=[])
+    ]
+    index = MqttTriggerIndex(app_context.config)
+
+    def _matches(topic: str):
+        return [(trigger.topic, wildcards) for _, trigger, wildcards in index.get_triggers(topic)]
+
+    assert _matches("a/b") == [
+        ("a/b", []), ("a/+", ["b"]), ("a/#", ["b"]), ("+/+", ["a", "b"]), ("#", ["a/b"]), ("+/b/#", ["a", ""])
+    ]
+    assert _matches("a") == [("a/#", [""]), ("#", ["a"])]
+    assert _matches("a/x/c") == [("a/#", ["x/c"]), ("#", ["a/x/c"]), ("a/+/c", ["x"])]
+    assert _matches("$SYS/broker") == [("$SYS/#", ["broker"])]
 
 def _mocked_flow_processor(app_context: AppContext, trigger_config: FlowTriggerMqttMessageConfig) -> FlowProcessor:
     processor, _ = mocked_flow_processor(app_context, trigger_config, actions=[
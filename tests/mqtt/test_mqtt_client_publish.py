@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from dbus2mqtt.config import FlowActionMqttPublishConfig, FlowTriggerScheduleConfig
+from dbus2mqtt.event_broker import FlowTriggerMessage, MqttMessage
+from dbus2mqtt.mqtt.mqtt_client import MqttClient
+from tests import mocked_app_context, mocked_flow_processor
+
+
+def _mocked_publishing_client(mqtt_client: MqttClient) -> list[int]:
+
+    published_mids: list[int] = []
+
+    def publish(topic, payload, properties):
+        mid = len(published_mids) + 1
+        published_mids.append(mid)
+        return MagicMock(rc=mqtt.MQTT_ERR_SUCCESS, mid=mid)
+
+    mqtt_client.client = MagicMock()
+    mqtt_client.client.publish.side_effect = publish
+    mqtt_client.connected_event.set()
+    return published_mids
+
+@pytest.mark.asyncio
+async def test_publish_does_not_block_and_respects_inflight_window():
+
+    app_context = mocked_app_context()
+    app_context.config.mqtt.publish_max_inflight = 2
+
+    mqtt_client = MqttClient(app_context, asyncio.get_running_loop())
+    published_mids = _mocked_publishing_client(mqtt_client)
+
+    for i in range(3):
+        await app_context.event_broker.publish_to_mqtt(MqttMessage(f"dbus2mqtt/test/{i}", {"i": i}))
+
+    task = asyncio.create_task(mqtt_client.mqtt_publish_queue_processor_task())
+    try:
+        # two messages are in flight, the third waits for a confirmation
+        await asyncio.sleep(0.05)
+        assert published_mids == [1, 2]
+
+        # paho confirms publishes from its network thread
+        thread = threading.Thread(target=mqtt_client.on_publish, args=(mqtt_client.client, None, 1, None, None))
+        thread.start()
+        thread.join()
+
+        await asyncio.wait_for(app_context.event_broker.mqtt_publish_queue.join(), timeout=1)
+        assert published_mids == [1, 2, 3]
+    finally:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_publish_confirmed_before_registration():
+
+    app_context = mocked_app_context()
+    mqtt_client = MqttClient(app_context, asyncio.get_running_loop())
+
+    # the network thread may confirm a message before client.publish returns
+    mqtt_client.on_publish(mqtt_client.client, None, 7, None, None)
+    future = mqtt_client._register_publish(7)
+
+    assert future.done()
+    assert not mqtt_client._publish_futures and not mqtt_client._published_mids
+
+@pytest.mark.asyncio
+async def test_failed_publish_is_not_skipped_by_only_on_change():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionMqttPublishConfig(
+            topic="dbus2mqtt/test",
+            payload_template={"status": "Playing"},
+            only_on_change=True
+        )
+    ])
+
+    mqtt_client = MqttClient(app_context, asyncio.get_running_loop())
+    published_mids = _mocked_publishing_client(mqtt_client)
+
+    # broker connection is lost, paho refuses the first publish
+    publish = mqtt_client.client.publish.side_effect
+    mqtt_client.client.publish.side_effect = lambda **kwargs: MagicMock(rc=mqtt.MQTT_ERR_NO_CONN, mid=0)
+
+    task = asyncio.create_task(mqtt_client.mqtt_publish_queue_processor_task())
+    try:
+        await processor._process_flow_trigger(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+        await asyncio.wait_for(app_context.event_broker.mqtt_publish_queue.join(), timeout=1)
+        assert published_mids == []
+
+        # the identical payload is published once the connection is back
+        mqtt_client.client.publish.side_effect = publish
+        await processor._process_flow_trigger(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+        await asyncio.wait_for(app_context.event_broker.mqtt_publish_queue.join(), timeout=1)
+        assert published_mids == [1]
+    finally:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_timed_out_publish_is_not_skipped_by_only_on_change():
+
+    app_context = mocked_app_context()
+    app_context.config.mqtt.publish_timeout = 0.01
+
+    mqtt_client = MqttClient(app_context, asyncio.get_running_loop())
+    publish_digests = app_context.event_broker.mqtt_publish_digests
+
+    assert publish_digests.should_publish("dbus2mqtt/test", {"status": "Playing"}, "json")
+
+    await mqtt_client._publish_window.acquire()
+    await mqtt_client._await_publish(1, mqtt_client._register_publish(1), "dbus2mqtt/test")
+
+    assert publish_digests.should_publish("dbus2mqtt/test", {"status": "Playing"}, "json")
+
+@pytest.mark.asyncio
+async def test_late_confirmation_does_not_confirm_reused_mid():
+
+    app_context = mocked_app_context()
+    app_context.config.mqtt.publish_timeout = 0.01
+
+    mqtt_client = MqttClient(app_context, asyncio.get_running_loop())
+
+    await mqtt_client._publish_window.acquire()
+    await mqtt_client._await_publish(5, mqtt_client._register_publish(5), "dbus2mqtt/test")
+
+    # the timed out message is confirmed after all, its confirmation is ignored
+    mqtt_client.on_publish(mqtt_client.client, None, 5, None, None)
+    assert not mqtt_client._published_mids and not mqtt_client._abandoned_mids
+
+    # paho reuses the mid for a new message, which is only confirmed by its own confirmation
+    future = mqtt_client._register_publish(5)
+    assert not future.done()
+
+    mqtt_client.on_publish(mqtt_client.client, None, 5, None, None)
+    await asyncio.wait_for(future, timeout=1)
@@ -0,0 +1,288 @@
+import asyncio
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from dbus_fast import Variant
+from dbus_fast.constants import MessageType
+
+from dbus2mqtt.config import FlowActionContextSetConfig, FlowTriggerScheduleConfig
+from dbus2mqtt.flow.flow_processor import FlowTriggerMessage
+from dbus2mqtt.template.dbus_template_functions import jinja_custom_dbus_functions
+from tests import mocked_app_context, mocked_dbus_client, mocked_flow_processor
+
+
+@pytest.mark.asyncio
+async def test_dbus_call_memoized_per_flow_execution():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionContextSetConfig(
+            context={
+                "first": "{{ dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', ['x']) }}",
+                "second": "{{ dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', ['x']) }}",
+                "not_memoized": "{{ dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', ['x'], memoize=False) }}",
+            },
+        ),
+        FlowActionContextSetConfig(
+            global_context={
+                "res": "{{ dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', ['x']) }}",
+            }
+        )
+    ])
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.get_subscribed_proxy_object = MagicMock()
+    dbus_client.call_dbus_interface_method = AsyncMock(return_value={"Volume": 1})
+    app_context.templating.add_functions(jinja_custom_dbus_functions(dbus_client))
+
+    await processor._process_flow_trigger(
+        FlowTriggerMessage(flow_config, trigger_config, datetime.now())
+    )
+
+    assert processor._global_context["res"] == {"Volume": 1}
+    assert dbus_client.call_dbus_interface_method.call_count == 2
+
+    # a new flow execution does not reuse results from the previous one
+    await processor._process_flow_trigger(
+        FlowTriggerMessage(flow_config, trigger_config, datetime.now())
+    )
+
+    assert dbus_client.call_dbus_interface_method.call_count == 4
+
+@pytest.mark.asyncio
+async def test_memoized_results_are_copies():
+
+    app_context = mocked_app_context()
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionContextSetConfig(
+            context={
+                "list": "{% set l = dbus_list('test.bus_name.*') %}{% set _ = l.append('x') %}{{ l }}",
+                "call": "{% set d = dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', []) %}{% set _ = d.update({'x': 1}) %}{{ d }}",
+            },
+        ),
+        FlowActionContextSetConfig(
+            global_context={
+                "list": "{{ dbus_list('test.bus_name.*') }}",
+                "call": "{{ dbus_call('test.bus_name.a', '/', 'test-interface-name', 'GetAll', []) }}",
+            }
+        )
+    ])
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.subscriptions["test.bus_name.a"] = MagicMock()
+    dbus_client.get_subscribed_proxy_object = MagicMock()
+    dbus_client.call_dbus_interface_method = AsyncMock(return_value={"Volume": 1})
+    app_context.templating.add_functions(jinja_custom_dbus_functions(dbus_client))
+
+    await processor._process_flow_trigger(
+        FlowTriggerMessage(flow_config, trigger_config, datetime.now())
+    )
+
+    # changes made by the first template are not visible to later calls
+    assert processor._global_context["list"] == ["test.bus_name.a"]
+    assert processor._global_context["call"] == {"Volume": 1}
+    assert dbus_client.call_dbus_interface_method.call_count == 1
+
+@pytest.mark.asyncio
+async def test_dbus_properties_from_property_mirror():
+
+    app_context = mocked_app_context()
+
+    bus_name = "test.bus_name.a"
+    interface = "test-interface-name"
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionContextSetConfig(
+            global_context={
+                "properties": "{{ dbus_properties('test.bus_name.a', '/', 'test-interface-name') }}",
+                "volume": "{{ dbus_property_get('test.bus_name.a', '/', 'test-interface-name', 'Volume') }}",
+            }
+        )
+    ])
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.get_subscribed_proxy_object = MagicMock()
+    dbus_client.get_dbus_interface_properties = AsyncMock(return_value={"Volume": 1, "Rate": 1.0})
+    dbus_client.get_dbus_interface_property = AsyncMock(return_value=1)
+    app_context.templating.add_functions(jinja_custom_dbus_functions(dbus_client))
+
+    dbus_client.bus = MagicMock()
+    dbus_client._add_match_rule = AsyncMock()
+    dbus_client._remove_match_rule = AsyncMock()
+    dbus_client.get_well_known_bus_name = MagicMock(return_value=bus_name)
+
+    # seeded with GetAll
+    await dbus_client._mirror_interface_properties(bus_name, "/", interface)
+    dbus_client.get_dbus_interface_properties.assert_called_once()
+    dbus_client._add_match_rule.assert_awaited_once()
+    match_rule = dbus_client._add_match_rule.call_args.args[0]
+
+    # updated from PropertiesChanged
+    dbus_client._property_mirror_message_handler(MagicMock(
+        message_type=MessageType.SIGNAL,
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        sender=":1.42",
+        path="/",
+        body=[interface, {"Volume": Variant("d", 0.5)}, []]
+    ))
+
+    await processor._process_flow_trigger(
+        FlowTriggerMessage(flow_config, trigger_config, datetime.now())
+    )
+
+    assert processor._global_context["properties"] == {"Volume": 0.5, "Rate": 1.0}
+    assert processor._global_context["volume"] == 0.5
+    dbus_client.get_dbus_interface_properties.assert_called_once()
+    dbus_client.get_dbus_interface_property.assert_not_called()
+
+    # removed objects are no longer mirrored
+    await dbus_client._remove_property_mirrors(bus_name, "/")
+    assert dbus_client.property_mirror.get_all(bus_name, "/", interface) is None
+    dbus_client._remove_match_rule.assert_awaited_once_with(match_rule)
+
+@pytest.mark.asyncio
+async def test_dbus_properties_falls_back_while_refetching():
+
+    app_context = mocked_app_context()
+
+    bus_name = "test.bus_name.a"
+    interface = "test-interface-name"
+
+    trigger_config = FlowTriggerScheduleConfig()
+    processor, flow_config = mocked_flow_processor(app_context, trigger_config, actions=[
+        FlowActionContextSetConfig(
+            global_context={
+                "properties": "{{ dbus_properties('test.bus_name.a', '/', 'test-interface-name') }}",
+            }
+        )
+    ])
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.get_subscribed_proxy_object = MagicMock()
+    dbus_client.get_dbus_interface_properties = AsyncMock(return_value={"Volume": 1, "Metadata": {"title": "a"}})
+    app_context.templating.add_functions(jinja_custom_dbus_functions(dbus_client))
+
+    dbus_client.bus = MagicMock()
+    dbus_client._add_match_rule = AsyncMock()
+    dbus_client._remove_match_rule = AsyncMock()
+    dbus_client.get_well_known_bus_name = MagicMock(return_value=bus_name)
+
+    await dbus_client._mirror_interface_properties(bus_name, "/", interface)
+
+    refetch_done = asyncio.Event()
+
+    async def _call_properties_interface(bus_name, path, member, signature, body):
+        await refetch_done.wait()
+        return MagicMock(body=[Variant("a{sv}", {"title": Variant("s", "b")})])
+
+    dbus_client._call_properties_interface = _call_properties_interface
+
+    # Metadata is invalidated and refetched
+    dbus_client._property_mirror_message_handler(MagicMock(
+        message_type=MessageType.SIGNAL,
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        sender=":1.42",
+        path="/",
+        body=[interface, {}, ["Metadata"]]
+    ))
+
+    # while refetching, the incomplete mirror is not used
+    await processor._process_flow_trigger(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+    assert processor._global_context["properties"] == {"Volume": 1, "Metadata": {"title": "a"}}
+    assert dbus_client.get_dbus_interface_properties.call_count == 2
+
+    refetch_done.set()
+    await asyncio.gather(*dbus_client._property_refetch_tasks)
+
+    await processor._process_flow_trigger(FlowTriggerMessage(flow_config, trigger_config, datetime.now()))
+    assert processor._global_context["properties"] == {"Volume": 1, "Metadata": {"title": "b"}}
+    assert dbus_client.get_dbus_interface_properties.call_count == 2
+
+@pytest.mark.asyncio
+async def test_property_mirror_skipped_when_add_match_fails():
+
+    app_context = mocked_app_context()
+
+    bus_name = "test.bus_name.a"
+    interface = "test-interface-name"
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.get_dbus_interface_properties = AsyncMock(return_value={"Volume": 1})
+
+    dbus_client.bus = MagicMock()
+    dbus_client._add_match_rule = AsyncMock(side_effect=Exception("AddMatch failed"))
+    dbus_client._remove_match_rule = AsyncMock()
+
+    await dbus_client._mirror_interface_properties(bus_name, "/", interface)
+
+    # without match rule the mirror would go stale, properties are read from D-Bus instead
+    assert not dbus_client.property_mirror.is_mirrored(bus_name, "/", interface)
+    assert dbus_client._property_mirror_match_rules == {}
+    dbus_client.get_dbus_interface_properties.assert_not_called()
+    dbus_client.bus.remove_message_handler.assert_called_once_with(dbus_client._property_mirror_message_handler)
+
+@pytest.mark.asyncio
+async def test_property_mirror_drops_stale_fetch_results():
+
+    app_context = mocked_app_context()
+
+    bus_name = "test.bus_name.a"
+    interface = "test-interface-name"
+
+    dbus_client = mocked_dbus_client(app_context)
+    dbus_client.bus = MagicMock()
+    dbus_client._add_match_rule = AsyncMock()
+    dbus_client.get_well_known_bus_name = MagicMock(return_value=bus_name)
+
+    def _properties_changed(changed: dict, invalidated: list):
+        dbus_client._property_mirror_message_handler(MagicMock(
+            message_type=MessageType.SIGNAL,
+            interface="org.freedesktop.DBus.Properties",
+            member="PropertiesChanged",
+            sender=":1.42",
+            path="/",
+            body=[interface, changed, invalidated]
+        ))
+
+    get_all_done = asyncio.Event()
+
+    async def _get_dbus_interface_properties(bus_name, path, interface):
+        await get_all_done.wait()
+        return {"Volume": 1, "Metadata": {"title": "a"}}
+
+    dbus_client.get_dbus_interface_properties = _get_dbus_interface_properties
+
+    # Volume changes while GetAll is in flight, the older GetAll value is dropped
+    mirror_task = asyncio.create_task(dbus_client._mirror_interface_properties(bus_name, "/", interface))
+    await asyncio.sleep(0)
+    _properties_changed({"Volume": Variant("d", 0.5)}, [])
+    get_all_done.set()
+    await mirror_task
+
+    assert dbus_client.property_mirror.get_all(bus_name, "/", interface) == {"Volume": 0.5, "Metadata": {"title": "a"}}
+
+    refetch_done = asyncio.Event()
+
+    async def _call_properties_interface(bus_name, path, member, signature, body):
+        await refetch_done.wait()
+        return MagicMock(body=[Variant("a{sv}", {"title": Variant("s", "b")})])
+
+    dbus_client._call_properties_interface = _call_properties_interface
+
+    # Metadata changes while its refetch is in flight, the older refetched value is dropped
+    _properties_changed({}, ["Metadata"])
+    _properties_changed({"Metadata": Variant("a{sv}", {"title": Variant("s", "c")})}, [])
+    refetch_done.set()
+    await asyncio.gather(*dbus_client._property_refetch_tasks)
+
+    assert dbus_client.property_mirror.get_all(bus_name, "/", interface) == {"Volume": 0.5, "Metadata": {"title": "c"}}
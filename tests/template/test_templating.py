@@ -1,5 +1,11 @@
+import asyncio
+import threading
 
-from dbus2mqtt.template.templating import TemplateEngine
+import pytest
+
+from jinja2 import TemplateError
+
+from dbus2mqtt.template.templating import CompiledTemplate, TemplateEngine
 
 
 def test_preregisted_custom_function():
@@ -143,3 +149,213 @@ def test_nested_list_values():
     res = templating.render_template(template, dict, context)
 
     assert res["res"]["plain_args"] == ["first-item", "second-item"]
+
+def test_compiled_template_cache_hits():
+    templating = TemplateEngine()
+
+    for i in range(3):
+        res = templating.render_template("{{ value + 1 }}", int, {"value": i})
+        assert res == i + 1
+
+    assert templating.cache_stats.misses == 1
+    assert templating.cache_stats.hits == 2
+    assert templating.cache_stats.compile_time > 0
+
+def test_compiled_template_cache_eviction():
+    templating = TemplateEngine(cache_size=2)
+
+    templating.render_template("{{ 1 }}", int)
+    templating.render_template("{{ 2 }}", int)
+    templating.render_template("{{ 1 }}", int)
+    templating.render_template("{{ 3 }}", int)
+
+    # '{{ 2 }}' was least recently used
+    assert templating.cache_stats.evictions == 1
+    assert len(templating._template_cache) == 2
+
+    templating.render_template("{{ 2 }}", int)
+    assert templating.cache_stats.misses == 4
+
+def test_compiled_template_cache_shared_between_threads():
+    templating = TemplateEngine(cache_size=4)
+
+    results = []
+
+    def _render(offset: int):
+        for i in range(200):
+            value = (i + offset) % 8
+            results.append(templating.render_template(f"{{{{ {value} }}}}", int) == value)
+
+    # mqtt_message filters render on paho's network thread while the event loop renders too
+    threads = [threading.Thread(target=_render, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 800 and all(results)
+    assert len(templating._template_cache) <= 4
+    assert templating.cache_stats.hits + templating.cache_stats.misses == 800
+
+def test_compiled_template():
+    templating = TemplateEngine()
+
+    compiled = templating.compile_template({
+        "value": "{{ value + 1 }}",
+        "nested": {
+            "static": 5,
+            "value": "{{ value }}"
+        }
+    })
+
+    assert isinstance(compiled["value"], CompiledTemplate)
+    assert compiled["nested"]["static"] == 5
+
+    res = templating.render_template(compiled, dict, {"value": 1})
+    assert res == {"value": 2, "nested": {"static": 5, "value": 1}}
+
+    # rendering compiled templates does not touch the template cache
+    assert templating.cache_stats.misses == 0
+
+def test_compile_template_syntax_error():
+    templating = TemplateEngine()
+
+    with pytest.raises(TemplateError):
+        templating.compile_template("{{ value + }}")
+
+def test_static_template():
+    templating = TemplateEngine()
+
+    compiled = templating.compile_template({
+        "mpris_path": "/org/mpris/MediaPlayer2",
+        "list_value": "[1, 2, 3]",
+        "nested": {
+            "int_value": "3",
+            "template": "{{ 3 }}"
+        }
+    })
+
+    assert compiled["mpris_path"].static
+    assert compiled["list_value"].static
+    assert compiled["nested"]["int_value"].static
+    assert not compiled["nested"]["template"].static
+
+    res = templating.render_template(compiled, dict)
+    assert res == {
+        "mpris_path": "/org/mpris/MediaPlayer2",
+        "list_value": [1, 2, 3],
+        "nested": {"int_value": 3, "template": 3}
+    }
+
+    # static values are constants, mutating a result does not affect the next render
+    res["list_value"].append(4)
+    res = templating.render_template(compiled, dict)
+    assert res["list_value"] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_static_template_async():
+    templating = TemplateEngine()
+
+    res = await templating.async_render_template("dbus2mqtt/org.mpris.MediaPlayer2/state", str)
+    assert res == "dbus2mqtt/org.mpris.MediaPlayer2/state"
+
+    compiled = templating._get_compiled_template("dbus2mqtt/org.mpris.MediaPlayer2/state")
+    assert compiled.static
+    assert compiled.async_template is None
+
+@pytest.mark.asyncio
+async def test_sync_render_path_without_async_functions():
+
+    async def dbus_call():
+        return "async-result"
+
+    templating = TemplateEngine()
+    templating.add_functions({
+        "dbus_call": dbus_call,
+        "dbus_list": lambda: ["org.mpris.MediaPlayer2.vlc"]
+    })
+
+    res = await templating.async_render_template("{{ dbus_list() | first }}", str)
+    assert res == "org.mpris.MediaPlayer2.vlc"
+
+    compiled = templating._get_compiled_template("{{ dbus_list() | first }}")
+    assert compiled.template is not None
+    assert compiled.async_template is None
+
+    res = await templating.async_render_template("{{ dbus_call() }}", str)
+    assert res == "async-result"
+
+    compiled = templating._get_compiled_template("{{ dbus_call() }}")
+    assert compiled.template is None
+    assert compiled.async_template is not None
+
+@pytest.mark.asyncio
+async def test_concurrent_dict_render():
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def dbus_call(value):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return value
+
+    templating = TemplateEngine()
+    templating.add_functions({"dbus_call": dbus_call})
+
+    template = {
+        "c": "{{ dbus_call('c') }}",
+        "static": "/org/mpris/MediaPlayer2",
+        "a": "{{ dbus_call('a') }}",
+        "nested": {
+            "b": "{{ dbus_call('b') }}",
+            "d": "{{ dbus_call('d') }}"
+        }
+    }
+
+    res = await templating.async_render_template(template, dict, concurrency=2)
+
+    assert res == {
+        "c": "c",
+        "static": "/org/mpris/MediaPlayer2",
+        "a": "a",
+        "nested": {"b": "b", "d": "d"}
+    }
+    assert list(res.keys()) == ["c", "static", "a", "nested"]
+    assert max_in_flight == 2
+
+    # default renders keys one by one
+    max_in_flight = 0
+    await templating.async_render_template(template, dict)
+    assert max_in_flight == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_dict_render_cancels_remaining_keys_on_error():
+
+    completed = []
+
+    async def dbus_call(value, delay):
+        await asyncio.sleep(delay)
+        if value == "fail":
+            raise ValueError("dbus call failed")
+        completed.append(value)
+        return value
+
+    templating = TemplateEngine()
+    templating.add_functions({"dbus_call": dbus_call})
+
+    template = {
+        "fail": "{{ dbus_call('fail', 0.01) }}",
+        "slow": "{{ dbus_call('slow', 0.1) }}",
+        "nested": {"slow": "{{ dbus_call('nested', 0.1) }}"}
+    }
+
+    with pytest.raises(ValueError):
+        await templating.async_render_template(template, dict, concurrency=4)
+
+    # the other keys are not left running in the background
+    await asyncio.sleep(0.2)
+    assert completed == []
@@ -0,0 +1,126 @@
+import asyncio
+
+from datetime import datetime
+
+import pytest
+
+from dbus2mqtt.config import (
+    FlowConfig,
+    FlowProcessorConfig,
+    FlowTriggerDbusSignalConfig,
+    FlowTriggerMqttMessageConfig,
+    FlowTriggerScheduleConfig,
+)
+from dbus2mqtt.event_broker import EventBroker, FlowTriggerMessage, FlowTriggerQueue
+
+
+def _trigger(flow: FlowConfig, trigger_config: FlowTriggerScheduleConfig, path: str, value: int):
+    return FlowTriggerMessage(flow, trigger_config, datetime.now(), {"bus_name": "org.test", "path": path, "value": value})
+
+@pytest.mark.asyncio
+async def test_flow_trigger_queue_fifo_keeps_all_triggers():
+
+    trigger_config = FlowTriggerScheduleConfig()
+    flow = FlowConfig(triggers=[trigger_config], actions=[])
+
+    queue = FlowTriggerQueue()
+    for value in range(3):
+        queue.put_nowait(_trigger(flow, trigger_config, "/a", value))
+
+    assert queue.qsize() == 3
+    assert queue.replaced_count == 0
+
+@pytest.mark.asyncio
+async def test_flow_trigger_queue_latest_replaces_pending_trigger():
+
+    trigger_config = FlowTriggerScheduleConfig()
+    flow = FlowConfig(triggers=[trigger_config], actions=[], queue_mode="latest")
+    other_flow = FlowConfig(triggers=[trigger_config], actions=[])
+
+    queue = FlowTriggerQueue()
+    queue.put_nowait(_trigger(flow, trigger_config, "/a", 1))
+    queue.put_nowait(_trigger(flow, trigger_config, "/b", 1))
+    queue.put_nowait(_trigger(other_flow, trigger_config, "/a", 1))
+    await queue.put(_trigger(flow, trigger_config, "/a", 2))
+    queue.put_nowait(_trigger(flow, trigger_config, "/a", 3))
+
+    assert queue.qsize() == 3
+    assert queue.replaced_count == 2
+
+    # the replacing trigger keeps the queue position of the replaced trigger
+    first = queue.get_nowait()
+    assert first.flow_config is flow and first.trigger_context == {"bus_name": "org.test", "path": "/a", "value": 3}
+    assert queue.get_nowait().trigger_context["path"] == "/b"
+    assert queue.get_nowait().flow_config is other_flow
+
+    # triggers are no longer replaced once taken from the queue
+    queue.put_nowait(_trigger(flow, trigger_config, "/a", 4))
+    assert queue.qsize() == 1
+
+@pytest.mark.asyncio
+async def test_flow_trigger_queue_latest_does_not_wait_when_full():
+
+    trigger_config = FlowTriggerScheduleConfig()
+    flow = FlowConfig(triggers=[trigger_config], actions=[], queue_mode="latest")
+
+    queue = FlowTriggerQueue(maxsize=1)
+    await queue.put(_trigger(flow, trigger_config, "/a", 1))
+    await queue.put(_trigger(flow, trigger_config, "/a", 2))
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait().trigger_context["value"] == 2
+
+def test_flow_trigger_queue_serves_priority_lanes_in_order():
+
+    schedule_trigger = FlowTriggerScheduleConfig()
+    mqtt_trigger = FlowTriggerMqttMessageConfig(topic="dbus2mqtt/test")
+    signal_trigger = FlowTriggerDbusSignalConfig(interface="org.test", signal="Test")
+    low_signal_trigger = FlowTriggerDbusSignalConfig(interface="org.test", signal="Test", priority="low")
+    flow = FlowConfig(triggers=[schedule_trigger, mqtt_trigger, signal_trigger, low_signal_trigger], actions=[])
+
+    queue = FlowTriggerQueue()
+    for trigger_config in [schedule_trigger, low_signal_trigger, signal_trigger, mqtt_trigger]:
+        queue.put_nowait(FlowTriggerMessage(flow, trigger_config, datetime.now()))
+
+    assert queue.lane_depths() == {"high": 1, "normal": 1, "low": 2}
+    assert [queue.get_nowait().flow_trigger_config for _ in range(4)] == [
+        mqtt_trigger, signal_trigger, schedule_trigger, low_signal_trigger
+    ]
+    assert queue.empty()
+
+def test_flow_trigger_queue_starvation_protection():
+
+    schedule_trigger = FlowTriggerScheduleConfig()
+    signal_trigger = FlowTriggerDbusSignalConfig(interface="org.test", signal="Test")
+    flow = FlowConfig(triggers=[schedule_trigger, signal_trigger], actions=[])
+
+    queue = FlowTriggerQueue(config=FlowProcessorConfig(starvation_limit=2))
+    queue.put_nowait(FlowTriggerMessage(flow, schedule_trigger, datetime.now()))
+    for _ in range(4):
+        queue.put_nowait(FlowTriggerMessage(flow, signal_trigger, datetime.now()))
+
+    types = [queue.get_nowait().flow_trigger_config.type for _ in range(5)]
+    assert types == ["dbus_signal", "dbus_signal", "schedule", "dbus_signal", "dbus_signal"]
+
+@pytest.mark.asyncio
+async def test_put_threadsafe_wakes_getter_from_other_thread():
+
+    event_broker = EventBroker()
+    queue = asyncio.Queue[int]()
+
+    getter = asyncio.create_task(queue.get())
+    await asyncio.sleep(0)
+
+    await asyncio.to_thread(event_broker.put_threadsafe, queue, 1)
+
+    assert await asyncio.wait_for(getter, timeout=1) == 1
+
+def test_put_threadsafe_without_loop_raises():
+
+    event_broker = EventBroker()
+    assert event_broker.loop is None
+
+    queue = asyncio.Queue[int]()
+    with pytest.raises(RuntimeError):
+        event_broker.put_threadsafe(queue, 1)
+    assert queue.empty()